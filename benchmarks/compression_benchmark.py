@@ -0,0 +1,71 @@
+"""
+Vergleicht übertragene Bytes und Ladezeit von Bestelldateien in S3 für die
+Kompressionsverfahren none/gzip/zstd.
+
+Die Übertragung wird über eine konfigurierbare Bandbreite simuliert, damit der
+Benchmark ohne AWS-Zugang läuft:
+
+    python benchmarks/compression_benchmark.py --days 30 --orders 800 --mbit 50
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from benchmarks.sample_data import generate_order_frame
+from src.s3_utils import compress_bytes, decompress_bytes, zstandard
+
+
+def run_benchmark(days, orders_per_day, mbit_per_second):
+    frames = [generate_order_frame(date(2024, 1, 1) + timedelta(days=i), orders_per_day) for i in range(days)]
+    payloads = [frame.to_csv(index=False).encode('utf-8') for frame in frames]
+    bytes_per_second = mbit_per_second * 1_000_000 / 8
+
+    codecs = ["none", "gzip"] + (["zstd"] if zstandard is not None else [])
+    results = []
+    for codec in codecs:
+        start = time.perf_counter()
+        objects = [compress_bytes(payload, codec) for payload in payloads]
+        write_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rows = 0
+        for obj in objects:
+            rows += len(pd.read_csv(BytesIO(decompress_bytes(obj))))
+        decode_seconds = time.perf_counter() - start
+
+        transferred = sum(len(obj) for obj in objects)
+        transfer_seconds = transferred / bytes_per_second
+        results.append({
+            "Kompression": codec,
+            "Bytes": transferred,
+            "Verhältnis": round(sum(len(p) for p in payloads) / transferred, 2),
+            "Schreiben (s)": round(write_seconds, 3),
+            "Übertragung (s)": round(transfer_seconds, 3),
+            "Entpacken+Parsen (s)": round(decode_seconds, 3),
+            "Laden gesamt (s)": round(transfer_seconds + decode_seconds, 3),
+            "Zeilen": rows,
+        })
+    return pd.DataFrame(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--orders", type=int, default=800, help="Bestellungen pro Tag")
+    parser.add_argument("--mbit", type=float, default=50.0, help="simulierte Bandbreite zu S3 in Mbit/s")
+    args = parser.parse_args()
+
+    if zstandard is None:
+        print("Hinweis: 'zstandard' ist nicht installiert, zstd wird übersprungen.")
+    print(run_benchmark(args.days, args.orders, args.mbit).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Lokaler Stand-in für die Billbee-API (GET /api/v1/orders mit Paging).
+
+Die Bestellungen werden pro Tag deterministisch aus benchmarks.sample_data
+erzeugt. Bestellungen mit Zeitstempel in der Zukunft werden zurückgehalten,
+sodass der heutige Tag wie im Live-Betrieb über den Tag wächst; Delta-Abrufe
+mit modifiedAtMin liefern nur die seitdem hinzugekommenen Bestellungen.
+Jede Antwort kann künstlich verzögert werden.
+
+    python benchmarks/fake_billbee.py --port 8765 --orders 500 --latency-ms 150
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.sample_data import generate_raw_orders
+
+
+def _as_utc(timestamp):
+    """Zeitstempel ohne Zeitzone gelten als UTC, wie bei Billbee."""
+    value = datetime.fromisoformat(timestamp)
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _modified_at(order):
+    # sample_data erzeugt lokale Zeitstempel ohne Zeitzone
+    return datetime.fromisoformat(order["LastModifiedAt"]).astimezone(timezone.utc)
+
+
+class FakeBillbeeHandler(BaseHTTPRequestHandler):
+    orders_per_day = 500
+    latency_seconds = 0.0
+    request_count = 0
+    _lock = threading.Lock()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if not url.path.endswith("/orders"):
+            self.send_error(404)
+            return
+        with self._lock:
+            type(self).request_count += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        page = int(params.get("page", 1))
+        page_size = int(params.get("pageSize", 250))
+
+        now = datetime.now(timezone.utc)
+        if "modifiedAtMin" in params:
+            modified_at_min = _as_utc(params["modifiedAtMin"])
+            first_day = modified_at_min.astimezone().date()
+            days = [first_day + timedelta(days=offset) for offset in range((now.astimezone().date() - first_day).days + 1)]
+            orders = [order for day in days for order in generate_raw_orders(day, self.orders_per_day)
+                      if modified_at_min <= _modified_at(order) <= now]
+        else:
+            orders = generate_raw_orders(date.fromisoformat(params["minOrderDate"][:10]), self.orders_per_day)
+            orders = [order for order in orders if _modified_at(order) <= now]
+        total_pages = max(1, -(-len(orders) // page_size))
+        body = json.dumps({
+            "Paging": {"Page": page, "TotalPages": total_pages, "TotalRows": len(orders), "PageSize": page_size},
+            "Data": orders[(page - 1) * page_size:page * page_size],
+        }).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_billbee(orders_per_day=500, latency_seconds=0.0, port=0):
+    """Startet den Server in einem Hintergrund-Thread und gibt (server, base_url) zurück."""
+    handler = type("ConfiguredFakeBillbeeHandler", (FakeBillbeeHandler,), {
+        "orders_per_day": orders_per_day,
+        "latency_seconds": latency_seconds,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, name="fake-billbee", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/api/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--orders", type=int, default=500, help="Bestellungen pro Tag")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, base_url = start_fake_billbee(args.orders, args.latency_ms / 1000, args.port)
+    print(f"Fake-Billbee läuft unter {base_url} (Strg+C beendet)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
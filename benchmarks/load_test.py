@@ -0,0 +1,243 @@
+"""
+Lasttest für die Übersichtsseite mit N gleichzeitigen, simulierten Nutzern.
+
+Jeder Nutzer ruft wiederholt die Datenfunktionen der Übersicht auf (Kosten laden,
+Kennzahlen berechnen, Tabelle bündeln, Diagramm aufbauen) – mit zufälligen
+Zeiträumen und Marktplätzen. Billbee wird durch benchmarks/fake_billbee.py
+ersetzt, S3 durch ein In-Memory-Dateisystem mit künstlicher Latenz.
+
+Ausgabe pro Szenario: p50/p95/p99-Latenz, Durchsatz und Spitzen-Speicher. Der
+Spitzen-Speicher wird in einem zweiten, nicht zeitgemessenen Durchlauf mit
+tracemalloc ermittelt, da tracemalloc die Latenzen um ein Vielfaches erhöht.
+
+    python benchmarks/load_test.py --days 120 --orders 300 --s3-latency-ms 20 --billbee-latency-ms 150
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+BUCKET = "loadtest-bucket"
+
+# name, Nutzer, Anfragen je Nutzer, Zeitraumlängen, Aktion, kalter Start
+SCENARIOS = [
+    {"name": "7 Tage, warm", "users": 5, "requests": 10, "range_days": [7], "action": "overview", "cold": False},
+    {"name": "30/90 Tage gemischt, warm", "users": 10, "requests": 5, "range_days": [30, 90], "action": "overview", "cold": False},
+    {"name": "90 Tage, kalter Start", "users": 5, "requests": 3, "range_days": [90], "action": "overview", "cold": True},
+    {"name": "Gesamter Zeitraum, kalter Start", "users": 3, "requests": 2, "range_days": [None], "action": "overview", "cold": True},
+    {"name": "Einzeltage von Billbee abrufen", "users": 6, "requests": 2, "range_days": [1], "action": "ingest", "cold": False},
+]
+
+
+def prepare_environment(work_dir, billbee_rate):
+    """Legt secrets.toml für Streamlit an; muss vor dem Import von streamlit passieren."""
+    os.makedirs(os.path.join(work_dir, ".streamlit"), exist_ok=True)
+    with open(os.path.join(work_dir, ".streamlit", "secrets.toml"), "w") as f:
+        f.write(f"""[aws]
+S3_BUCKET_NAME = "{BUCKET}"
+AWS_ACCESS_KEY_ID = "loadtest"
+AWS_SECRET_ACCESS_KEY = "loadtest"
+AWS_DEFAULT_REGION = "eu-central-1"
+
+[billbee]
+API_KEY = "loadtest"
+USERNAME = "loadtest"
+PASSWORD = "loadtest"
+REQUESTS_PER_SECOND = {billbee_rate}
+BURST = {max(1, int(billbee_rate))}
+
+[scheduler]
+ENABLED = false
+""")
+    os.chdir(work_dir)
+
+
+def install_s3_stand_in(latency_seconds):
+    """Ersetzt get_s3_fs in allen App-Modulen durch ein In-Memory-Dateisystem mit Latenz."""
+    from fsspec.implementations.memory import MemoryFileSystem
+
+    class SlowMemoryFileSystem(MemoryFileSystem):
+        store = {}
+        pseudo_dirs = [""]
+        cachable = False
+
+        def exists(self, path, **kwargs):
+            time.sleep(latency_seconds)
+            return super().exists(path, **kwargs)
+
+        def _open(self, path, mode="rb", **kwargs):
+            time.sleep(latency_seconds)
+            return super()._open(path, mode, **kwargs)
+
+    fs = SlowMemoryFileSystem()
+    fs.mkdir(BUCKET)
+    for name, module in list(sys.modules.items()):
+        if name.startswith("src.") and hasattr(module, "get_s3_fs"):
+            module.get_s3_fs = lambda: fs
+    return fs
+
+
+def seed_data(days, end_date):
+    """Importiert `days` Tage über den Fake-Billbee-Server und legt Kostentabellen an."""
+    from benchmarks.sample_data import generate_cost_tables
+    from src.ingest import ingest_orders_for_date
+    from src.inventory_management import save_material_costs
+    from src.fulfillment_costs import save_fulfillment_costs
+    from src.transaction_costs import save_transaction_costs
+
+    material_costs, fulfillment_costs, transaction_costs = generate_cost_tables()
+    save_material_costs(material_costs)
+    save_fulfillment_costs(fulfillment_costs)
+    save_transaction_costs(transaction_costs)
+    for offset in range(days):
+        ingest_orders_for_date(end_date - timedelta(days=offset), priority="batch")
+
+
+def simulate_page_view(dates, marketplace):
+    """
+    Entspricht der Arbeit eines Seitenaufrufs der Übersicht (ohne Browser) und
+    folgt display_filtered_overview_table() in main.py: Kostensummen je Konto und
+    Tag sammeln, Marktplatz aus den Summen wählen, zusammenfassen.
+    """
+    from src.accounts import get_accounts
+    from src.overview import load_overview_costs, collect_day_costs, day_cost_platforms, fold_day_costs, marketplace_options
+    from src.overview_table import bucket_overview_data, choose_granularity
+    from src.charts import build_trend_figure, REVENUE_SERIES
+
+    costs = load_overview_costs()
+    day_costs, _ = collect_day_costs(dates, costs, accounts=get_accounts())
+    if not day_costs:
+        return 0
+    if marketplace not in marketplace_options(day_cost_platforms(day_costs)):
+        marketplace = "Alle"
+    overview_data, stats = fold_day_costs(day_costs, marketplace, costs)
+    if not overview_data.empty:
+        data = bucket_overview_data(overview_data, choose_granularity(len(dates)))
+        data['Datum'] = data['Datum'].astype('datetime64[ns]')
+        build_trend_figure(data, REVENUE_SERIES, "Umsatz", " €").to_json()
+    return stats['loaded_orders']
+
+
+def run_users(scenario, end_date, seeded_days, seed, marketplaces):
+    """Führt alle Nutzer eines Szenarios parallel aus. Gibt (Latenzen, Fehler, Laufzeit) zurück."""
+    from src.cache import clear_caches
+    from src.ingest import ingest_orders_for_date
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def user(user_index):
+        rng = random.Random(seed * 1000 + user_index)
+        for _ in range(scenario["requests"]):
+            range_days = min(rng.choice(scenario["range_days"]) or seeded_days, seeded_days)
+            range_end = end_date - timedelta(days=rng.randint(0, max(0, seeded_days - range_days)))
+            dates = [range_end - timedelta(days=offset) for offset in range(range_days - 1, -1, -1)]
+            started = time.perf_counter()
+            try:
+                if scenario["action"] == "ingest":
+                    ingest_orders_for_date(range_end, priority="interactive")
+                else:
+                    simulate_page_view(dates, rng.choice(marketplaces))
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+
+    # Jeder Durchlauf beginnt mit leeren Caches; warme Szenarien füllen sie vorab
+    clear_caches()
+    if not scenario["cold"]:
+        warm_dates = [end_date - timedelta(days=offset) for offset in range(seeded_days - 1, -1, -1)]
+        simulate_page_view(warm_dates, marketplaces[0])
+    started = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(index,)) for index in range(scenario["users"])]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, time.perf_counter() - started
+
+
+def run_scenario(scenario, end_date, seeded_days, seed):
+    from src.overview import marketplace_options
+    from benchmarks.sample_data import PLATFORMS
+    import numpy as np
+
+    marketplaces = marketplace_options(PLATFORMS)
+    latencies, errors, wall_seconds = run_users(scenario, end_date, seeded_days, seed, marketplaces)
+
+    # Spitzen-Speicher in einem eigenen Durchlauf, der die gefüllten Caches einschließt
+    tracemalloc.start()
+    run_users(scenario, end_date, seeded_days, seed, marketplaces)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p50, p95, p99 = (np.percentile(latencies, [50, 95, 99]) * 1000) if latencies else (float("nan"),) * 3
+    return {
+        "Szenario": scenario["name"],
+        "Nutzer": scenario["users"],
+        "Anfragen": len(latencies),
+        "Fehler": len(errors),
+        "p50 (ms)": round(p50, 1),
+        "p95 (ms)": round(p95, 1),
+        "p99 (ms)": round(p99, 1),
+        "Durchsatz (1/s)": round(len(latencies) / wall_seconds, 2),
+        "Spitzen-Speicher (MB)": round(peak_bytes / 1024 / 1024, 1),
+    }, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=120, help="Anzahl importierter Tage")
+    parser.add_argument("--orders", type=int, default=300, help="Bestellungen pro Tag")
+    parser.add_argument("--s3-latency-ms", type=float, default=20.0)
+    parser.add_argument("--billbee-latency-ms", type=float, default=150.0)
+    parser.add_argument("--billbee-rate", type=float, default=2.0, help="Anfragen pro Sekunde an Billbee")
+    parser.add_argument("--users-factor", type=float, default=1.0, help="skaliert die Nutzerzahl aller Szenarien")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    prepare_environment(tempfile.mkdtemp(prefix="profit_app_loadtest_"), args.billbee_rate)
+
+    import logging
+    logging.basicConfig(level=logging.ERROR)
+    import pandas as pd
+    from benchmarks.fake_billbee import start_fake_billbee
+    import src.ingest
+    import src.overview
+    import src.profiling
+    from src.billbee_api import BillbeeAPI
+
+    server, base_url = start_fake_billbee(args.orders, args.billbee_latency_ms / 1000)
+    BillbeeAPI.BASE_URL = base_url
+    install_s3_stand_in(args.s3_latency_ms / 1000)
+
+    end_date = date.today() - timedelta(days=1)
+    print(f"Importiere {args.days} Tage à {args.orders} Bestellungen über {base_url} ...")
+    started = time.perf_counter()
+    seed_data(args.days, end_date)
+    print(f"Import abgeschlossen in {time.perf_counter() - started:.1f} s")
+
+    results = []
+    for scenario in SCENARIOS:
+        scenario = dict(scenario, users=max(1, round(scenario["users"] * args.users_factor)))
+        result, errors = run_scenario(scenario, end_date, args.days, args.seed)
+        results.append(result)
+        for error in errors[:3]:
+            print(f"  Fehler in '{scenario['name']}': {error}")
+    server.shutdown()
+
+    print(pd.DataFrame(results).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Erzeugt realistische Bestelldaten im Format von process_orders() für Benchmarks.
+"""
+import random
+from datetime import datetime, timedelta
+
+PLATFORMS = ["Shopify", "Amazon", "eBay", "Kaufland.de"]
+COUNTRIES = ["DE"] * 12 + ["AT"] * 3 + ["CH", "NL", "FR", "PL", "GB"]
+CURRENCIES = {"CH": "CHF", "GB": "GBP", "PL": "PLN"}
+SKUS = [f"{10000 + i}" for i in range(400)]
+
+
+def generate_raw_orders(date, count, seed=None):
+    """Erzeugt Bestellungen im Format der Billbee-API (vor process_orders)."""
+    rng = random.Random(seed if seed is not None else date.toordinal())
+    orders = []
+    for i in range(count):
+        country = rng.choice(COUNTRIES)
+        items = []
+        for _ in range(rng.choice([1, 1, 1, 2, 2, 3])):
+            quantity = rng.choice([1, 1, 1, 2, 3])
+            price = round(rng.uniform(8, 90), 2) * quantity
+            items.append({
+                "Quantity": quantity,
+                "TotalPrice": round(price, 2),
+                "TaxAmount": round(price * 0.19 / 1.19, 2),
+                "Product": {
+                    "SKU": f"{rng.choice(SKUS)}-{rng.choice(['S', 'M', 'L', 'XL'])}",
+                    "Weight": rng.choice([150, 250, 400, 800, 1200]),
+                },
+            })
+        created_at = datetime.combine(date, datetime.min.time()) + timedelta(seconds=rng.randint(0, 86399))
+        orders.append({
+            "BillBeeOrderId": date.toordinal() * 100000 + i,
+            "Seller": {"Platform": rng.choice(PLATFORMS)},
+            "ShippingAddress": {"CountryISO2": country},
+            "Currency": CURRENCIES.get(country, "EUR"),
+            "CreatedAt": created_at.isoformat(),
+            "LastModifiedAt": created_at.isoformat(),
+            "TotalCost": round(sum(item["TotalPrice"] for item in items), 2),
+            "OrderItems": items,
+        })
+    return orders
+
+
+def generate_order_frame(date, count, seed=None):
+    """Erzeugt einen DataFrame wie create_dataframe(process_orders(...))."""
+    from src.data_processor import process_orders, create_dataframe
+    return create_dataframe(process_orders(generate_raw_orders(date, count, seed)))
+
+
+def generate_cost_tables():
+    """Erzeugt Material-, Fulfillment-, Transaktions- und Marketingkosten."""
+    import pandas as pd
+    rng = random.Random(42)
+    material_costs = pd.DataFrame({"SKU": SKUS, "Cost": [round(rng.uniform(2, 30), 2) for _ in SKUS]})
+    fulfillment_costs = pd.DataFrame([{"Auftragspauschale": 1.2, "SKU_Pick": 0.25, "Kartonage": 0.4}])
+    transaction_costs = pd.DataFrame({
+        "Platform": PLATFORMS,
+        "TransactionCostPercent": [2.5, 15.0, 11.0, 10.5],
+    })
+    return material_costs, fulfillment_costs, transaction_costs
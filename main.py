@@ -5,12 +5,24 @@ import pandas as pd
 import os
 import json
 from src.billbee_api import BillbeeAPI
-from src.s3_operations import save_to_s3, get_saved_dates, load_from_s3, save_daily_order_data
-from src.s3_utils import get_s3_fs
-from src.data_processor import process_orders, create_dataframe, save_to_csv
-from src.fulfillment_costs import calculate_shipping_costs, load_fulfillment_costs, save_fulfillment_costs
+from src.s3_operations import upsert_to_s3, get_saved_dates, load_from_s3
+from src.ingest import ingest_all_accounts
+from src.accounts import get_accounts, selected_accounts, DEFAULT_ACCOUNT, ALL_ACCOUNTS_LABEL
+from src.background_jobs import get_job_scheduler, display_job_status
+from src.profiling import profiling_requested, run_profiled, record_profile_tags, PROFILE_TOGGLE_KEY
+from src.data_processor import process_orders, create_dataframe, save_to_csv, deduplicate_orders, removed_order_ids
+from src.fulfillment_costs import load_fulfillment_costs, save_fulfillment_costs
 from src.transaction_costs import load_transaction_costs, save_transaction_costs
 from src.marketing_costs import load_marketing_costs, save_marketing_costs
+from src.inventory_management import load_material_costs, save_material_costs
+from src.overview_table import display_overview_table, GRANULARITIES
+from src.charts import display_trend_charts
+from src.order_schema import concat_order_frames, memory_report
+from src.exchange_rates import load_exchange_rates, save_exchange_rates, import_exchange_rates_from_file, LOCAL_EXCHANGE_RATES_FILE
+from src.cost_index import rebuild_cost_index
+from src.profit_export import export_order_profit_to_s3, export_order_profit_to_file, upload_export_to_s3, presigned_url, EXPORT_FORMATS, DIRECT_DOWNLOAD_MAX_BYTES
+from src.live_view import get_live_day, compute_live_overview, get_refresh_seconds
+from src.overview import collect_day_costs, day_cost_platforms, fold_day_costs, refresh_order_costs, load_overview_costs, costs_missing, marketplace_options
 
 # Configure logging
 logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -20,6 +32,7 @@ st.set_page_config(page_title="E-Commerce Profitabilitäts-App", layout="wide")
 
 # Initialize BillbeeAPI
 billbee_api = BillbeeAPI()
+LIVE_REFRESH_SECONDS = get_refresh_seconds()
 
 def load_and_process_billbee_data(file_path):
     df = pd.read_csv(file_path)
@@ -40,33 +53,6 @@ def load_and_process_billbee_data(file_path):
     
     return df, grouped
 
-def load_material_costs():
-    s3 = get_s3_fs()
-    bucket_name = st.secrets['aws']['S3_BUCKET_NAME']
-    file_path = f"{bucket_name}/material_costs.csv"
-    try:
-        if s3.exists(file_path):
-            with s3.open(file_path, 'rb') as f:
-                df = pd.read_csv(f)
-                df['SKU'] = df['SKU'].astype(str)
-                return df
-        return pd.DataFrame(columns=['SKU', 'Cost'])
-    except Exception as e:
-        logger.error(f"Fehler beim Laden der Materialkostendaten: {str(e)}")
-        raise
-
-def save_material_costs(df):
-    s3 = get_s3_fs()
-    bucket_name = st.secrets['aws']['S3_BUCKET_NAME']
-    file_path = f"{bucket_name}/material_costs.csv"
-    try:
-        df['SKU'] = df['SKU'].astype(str)
-        with s3.open(file_path, 'w') as f:
-            df.to_csv(f, index=False)
-    except Exception as e:
-        logger.error(f"Fehler beim Speichern der Materialkostendaten: {str(e)}")
-        raise
-
 def calculate_material_costs(orders_df, material_costs_df):
     # Extrahieren der ersten 5 Ziffern aus der SKU für die Zuordnung
     orders_df['SKU_prefix'] = orders_df['SKU'].str[:5]
@@ -80,19 +66,6 @@ def calculate_material_costs(orders_df, material_costs_df):
     
     return merged
 
-def calculate_profit(processed_df):
-    # Gruppieren nach OrderNumber und berechnen der Gesamtmaterialkosten
-    order_costs = processed_df.groupby('OrderNumber').agg({
-        'MaterialCost': 'sum',
-        'NetRevenue': 'first',
-        'ShippingCost': 'first'
-    }).reset_index()
-    
-    # Berechnen des Gewinns
-    order_costs['Profit'] = order_costs['NetRevenue'] - order_costs['MaterialCost'] - order_costs['ShippingCost']
-    
-    return order_costs
-
 def process_order_items(order_items_str):
     items = json.loads(order_items_str.replace("'", '"'))
     return [(item['SKU'], float(item['Quantity'])) for item in items]
@@ -100,31 +73,53 @@ def process_order_items(order_items_str):
 def fetch_yesterday_data():
     yesterday = datetime.now().date() - timedelta(days=1)
     if yesterday not in get_saved_dates():
-        try:
-            orders_data = billbee_api.get_orders_for_date(yesterday)
-            df = pd.DataFrame(orders_data)
-            save_daily_order_data(df, yesterday)
-            save_to_s3(df, yesterday)
-            st.success(f"Daten für {yesterday} erfolgreich abgerufen und gespeichert.")
-        except Exception as e:
-            logger.error(f"Fehler beim Abrufen der Daten für {yesterday}: {str(e)}")
-            st.error(f"Fehler beim Abrufen der Daten für {yesterday}. Bitte überprüfen Sie die Logs für weitere Details.")
+        for account, result in ingest_all_accounts(yesterday, priority="interactive").items():
+            if isinstance(result, Exception):
+                st.error(f"Fehler beim Abrufen der Daten für {yesterday} ({account}). Bitte überprüfen Sie die Logs für weitere Details.")
+            else:
+                st.success(f"Daten für {yesterday} ({account}) erfolgreich abgerufen und gespeichert.")
     else:
         logger.warning(f"Daten für {yesterday} wurden bereits importiert.")
         st.info(f"Daten für {yesterday} wurden bereits importiert.")
 
-def fetch_data_for_range(start_date, end_date):
+def select_accounts(key):
+    """Shop-Auswahl; wird nur angezeigt, wenn mehrere Billbee-Konten konfiguriert sind."""
+    accounts = get_accounts()
+    if len(accounts) <= 1:
+        return accounts
+    selection = st.selectbox("Shop", [ALL_ACCOUNTS_LABEL] + accounts, key=key)
+    return selected_accounts(selection)
+
+def fetch_all_accounts(dates, accounts, priority="interactive"):
+    """Importiert die Tage für mehrere Konten parallel und zeigt das Ergebnis je Konto an."""
+    rows = []
+    failed = False
+    for date in dates:
+        for account, result in ingest_all_accounts(date, priority, accounts).items():
+            if isinstance(result, Exception):
+                failed = True
+                rows.append({'Datum': date, 'Shop': account, 'Bestellungen': None, 'Neu/geändert': None, 'Fehler': str(result)})
+            else:
+                rows.append({'Datum': date, 'Shop': account, 'Bestellungen': result[0], 'Neu/geändert': result[1], 'Fehler': ''})
+    if failed:
+        st.error("Der Import ist für einzelne Shops fehlgeschlagen. Bitte überprüfen Sie die Logs für weitere Details.")
+    else:
+        st.success(f"Daten für {len(dates)} Tage und {len(accounts)} Shops erfolgreich abgerufen und gespeichert.")
+    return pd.DataFrame(rows)
+
+def fetch_data_for_range(start_date, end_date, account=None):
     try:
         all_data = []
         current_date = start_date
         while current_date <= end_date:
-            df = fetch_and_process_data(current_date)
+            # Zeitraum-Abrufe laufen als Batch, damit Einzelabrufe anderer Nutzer Vorrang haben
+            df = fetch_and_process_data(current_date, priority="batch", account=account)
             if df is not None:
                 all_data.append(df)
             current_date += timedelta(days=1)
         
         if all_data:
-            combined_df = pd.concat(all_data, ignore_index=True)
+            combined_df = deduplicate_orders(pd.concat(all_data, ignore_index=True))
             st.success(f"Daten von {start_date} bis {end_date} erfolgreich abgerufen und gespeichert.")
             return combined_df
         else:
@@ -134,6 +129,63 @@ def fetch_data_for_range(start_date, end_date):
         st.error(f"Fehler beim Abrufen der Daten von {start_date} bis {end_date}. Bitte überprüfen Sie die Logs für weitere Details.")
         return None
 
+def display_profit_export_page():
+    st.subheader("Profit-Export je Bestellung")
+    st.caption("DB1 und DB2 je Bestellung, blockweise berechnet und geschrieben.")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        start_date = st.date_input("Startdatum", datetime.now().date() - timedelta(days=30), key="export_start")
+    with col2:
+        end_date = st.date_input("Enddatum", datetime.now().date() - timedelta(days=1), key="export_end")
+    
+    costs = load_overview_costs()
+    accounts = select_accounts("export_account")
+    marketplace = st.selectbox("Marktplatz", marketplace_options(costs['transaction_costs']['Platform']), key="export_marketplace")
+    file_format = st.radio("Format", EXPORT_FORMATS, horizontal=True)
+    target = st.radio("Ziel", ["S3 (Download-Link)", "Direkter Download"], horizontal=True,
+                      help=f"Der direkte Download wird vom Browser vollständig übertragen; Exporte über {DIRECT_DOWNLOAD_MAX_BYTES // 1024 // 1024} MB werden über S3 bereitgestellt.")
+    
+    if st.button("Export starten"):
+        if costs_missing(costs):
+            st.warning("Keine Material-, Fulfillment- oder Transaktionskosten gefunden.")
+            return
+        dates = []
+        current_date = start_date
+        while current_date <= end_date:
+            dates.append(current_date)
+            current_date += timedelta(days=1)
+        if not dates:
+            st.warning("Das Enddatum liegt vor dem Startdatum.")
+            return
+        
+        progress = st.progress(0.0, text="Exportiere Bestellungen ...")
+        on_progress = lambda done: progress.progress(done / len(dates))
+        try:
+            if target == "Direkter Download":
+                path, file_name, row_count = export_order_profit_to_file(dates, costs, file_format, marketplace, on_progress, accounts)
+                try:
+                    size = os.path.getsize(path)
+                    if size > DIRECT_DOWNLOAD_MAX_BYTES:
+                        s3_path = upload_export_to_s3(path, file_name)
+                        st.warning(f"Der Export ist mit {size / 1024 / 1024:.0f} MB zu groß für den direkten Download und wird über S3 bereitgestellt.")
+                        st.link_button("Export herunterladen", presigned_url(s3_path))
+                        st.caption(f"Gespeichert unter s3://{s3_path}")
+                    else:
+                        with open(path, 'rb') as f:
+                            st.download_button("Export herunterladen", data=f.read(), file_name=file_name)
+                finally:
+                    os.remove(path)
+            else:
+                path, row_count = export_order_profit_to_s3(dates, costs, file_format, marketplace, on_progress, accounts)
+                st.link_button("Export herunterladen", presigned_url(path))
+                st.caption(f"Gespeichert unter s3://{path}")
+            st.success(f"{row_count} Bestellungen exportiert.")
+        except Exception as e:
+            st.error(f"Fehler beim Export: {str(e)}")
+        finally:
+            progress.empty()
+
 def display_overview_page():
     st.subheader("Übersicht anzeigen")
     
@@ -149,6 +201,10 @@ def display_overview_page():
     if 'selected_country' not in st.session_state:
         st.session_state.selected_country = "Alle"
 
+    if st.toggle("Live-Ansicht heute", help=f"Fragt Billbee alle {LIVE_REFRESH_SECONDS} Sekunden nach neuen oder geänderten Bestellungen"):
+        display_live_overview()
+        return
+
     # Datumsauswahl
     col1, col2 = st.columns(2)
     with col1:
@@ -164,89 +220,145 @@ def display_overview_page():
     if st.session_state.show_table:
         display_filtered_overview_table()
 
+def display_live_overview():
+    accounts = select_accounts("live_account")
+    costs = load_overview_costs()
+    select_marketplace(marketplace_options(costs['transaction_costs']['Platform']))
+    if costs_missing(costs):
+        st.warning("Keine Material-, Fulfillment- oder Transaktionskosten gefunden.")
+        return
+    display_live_figures(accounts, st.session_state.selected_marketplace)
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def display_live_figures(accounts, marketplace):
+    """Wird im Intervall neu ausgeführt und zeigt den letzten Live-Stand; Abrufe laufen im Hintergrund."""
+    costs = load_overview_costs()
+    live_days = [get_live_day(account, costs) for account in accounts]
+    for live in live_days:
+        if live.last_error:
+            st.error(f"Fehler beim Abrufen der Live-Daten ({live.account}): {live.last_error}")
+    if any(live.last_poll is None for live in live_days):
+        st.info("Die Bestellungen von heute werden geladen …")
+        return
+    order_count = sum(len(live.orders) for live in live_days)
+    last_poll = min(live.last_poll for live in live_days).astimezone()
+    st.caption(f"Stand {last_poll:%H:%M:%S} · {order_count} Bestellungen heute · Aktualisierung alle {LIVE_REFRESH_SECONDS} Sekunden")
+    
+    overview_data = compute_live_overview(live_days, marketplace, costs)
+    if overview_data.empty:
+        st.info("Heute liegen noch keine Bestellungen für den ausgewählten Filter vor.")
+        return
+    
+    today = overview_data.iloc[0]
+    cols = st.columns(4)
+    for col, metric in zip(cols, ['Umsatz Netto', 'Deckungsbeitrag 1', 'Deckungsbeitrag 2', 'Deckungsbeitrag 3']):
+        col.metric(metric, f"{today[metric]:.2f} €")
+    display_overview_table(overview_data, "Tag", key="live_overview_table")
+
+def display_memory_report(dates, accounts):
+    """Lädt die Rohdaten des Zeitraums nur für den Speicherbericht."""
+    all_data = []
+    for date in dates:
+        day_data = [load_from_s3(date, account=account) for account in accounts]
+        all_data.extend(df for df in day_data if df is not None and not df.empty)
+    if not all_data:
+        return
+    combined_df = deduplicate_orders(concat_order_frames(all_data))
+    del all_data
+    with st.expander("Speicherbedarf der geladenen Bestelldaten", expanded=True):
+        report = memory_report(combined_df)
+        st.caption(f"{len(combined_df)} Bestellungen, {report['Bytes'].iloc[-1] / 1024 / 1024:.2f} MB")
+        st.dataframe(report, hide_index=True, use_container_width=True)
+
+def select_marketplace(unique_marketplaces):
+    st.session_state.selected_marketplace = st.selectbox(
+        "Marktplatz auswählen", 
+        unique_marketplaces, 
+        index=unique_marketplaces.index(st.session_state.selected_marketplace) if st.session_state.selected_marketplace in unique_marketplaces else 0
+    )
+    return st.session_state.selected_marketplace
+
 def display_filtered_overview_table():
     try:
-        all_data = []
-        missing_dates = []
+        dates = []
         current_date = st.session_state.start_date
         while current_date <= st.session_state.end_date:
-            df = load_from_s3(current_date)
-            if df is not None and not df.empty:
-                all_data.append(df)
-            else:
-                missing_dates.append(current_date)
+            dates.append(current_date)
             current_date += timedelta(days=1)
         
-        if all_data:
-            combined_df = pd.concat(all_data, ignore_index=True)
-            
-            # Laden der Kosten
-            material_costs = load_material_costs()
-            fulfillment_costs = load_fulfillment_costs()
-            transaction_costs = load_transaction_costs()
-            marketing_costs = load_marketing_costs()
-            
-            # Erstellen der Auswahlfelder für Marktplatz
-            unique_marketplaces = ["Alle"] + list(combined_df['Platform'].unique())
-            
-            # Ersetze 'eBay' durch 'Ebay' in der Liste der Marktplätze
-            unique_marketplaces = ['Ebay' if x == 'eBay' else x for x in unique_marketplaces]
-            
-            st.session_state.selected_marketplace = st.selectbox(
-                "Marktplatz auswählen", 
-                unique_marketplaces, 
-                index=unique_marketplaces.index(st.session_state.selected_marketplace) if st.session_state.selected_marketplace in unique_marketplaces else 0
-            )
-            
-            # Filtern der Daten basierend auf dem ausgewählten Marktplatz
-            filtered_df = combined_df
-            if st.session_state.selected_marketplace != "Alle":
-                # Berücksichtige beide Schreibweisen beim Filtern
-                filtered_df = filtered_df[filtered_df['Platform'].isin(['Ebay', 'eBay']) if st.session_state.selected_marketplace == 'Ebay' else (filtered_df['Platform'] == st.session_state.selected_marketplace)]
-            
-            if filtered_df.empty:
-                st.warning("Keine Daten für den ausgewählten Filter verfügbar.")
-            elif material_costs.empty or fulfillment_costs.empty or transaction_costs.empty:
-                st.warning("Keine Material-, Fulfillment- oder Transaktionskosten gefunden.")
-            else:
-                overview_data = calculate_overview_data(filtered_df, material_costs.set_index('SKU')['Cost'].to_dict(), fulfillment_costs, transaction_costs)
-                
-                # Füge Marketingkosten hinzu
-                overview_data = pd.merge(overview_data, marketing_costs, left_on='Datum', right_on='Date', how='left')
-                
-                # Wähle die entsprechende Marketingkostenspalte basierend auf dem ausgewählten Marktplatz
-                if st.session_state.selected_marketplace == 'Shopify':
-                    overview_data['Marketingkosten'] = overview_data['Google Ads']
-                elif st.session_state.selected_marketplace == 'Amazon':
-                    overview_data['Marketingkosten'] = overview_data['Amazon Ads']
-                elif st.session_state.selected_marketplace == 'Ebay':
-                    overview_data['Marketingkosten'] = overview_data['Ebay Ads']
-                elif st.session_state.selected_marketplace == 'Kaufland.de':
-                    overview_data['Marketingkosten'] = overview_data['Kaufland Ads']
-                else:
-                    overview_data['Marketingkosten'] = overview_data['Google Ads'] + overview_data['Amazon Ads'] + overview_data['Ebay Ads'] + overview_data['Kaufland Ads']
-                
-                overview_data['Marketingkosten'] = overview_data['Marketingkosten'].fillna(0)
-                overview_data['Deckungsbeitrag 3'] = overview_data['Deckungsbeitrag 2'] - overview_data['Marketingkosten']
-                
-                # Runde die neuen Spalten
-                overview_data['Marketingkosten'] = overview_data['Marketingkosten'].round(2)
-                overview_data['Deckungsbeitrag 3'] = overview_data['Deckungsbeitrag 3'].round(2)
-                
-                # Transponiere die Daten und zeige sie an
-                transposed_data = transpose_overview_data(overview_data)
-                st.dataframe(transposed_data, height=600, use_container_width=True)
-                display_summary(overview_data)
-        else:
+        accounts = select_accounts("overview_account")
+        
+        # Laden der Kosten
+        costs = load_overview_costs()
+        if costs_missing(costs):
+            st.warning("Keine Material-, Fulfillment- oder Transaktionskosten gefunden.")
+            return
+        
+        # Die Übersicht entsteht aus den Kostensummen je Konto und Tag; diese sind
+        # gecacht und werden nachts vorberechnet, nur fehlende Tage werden geladen
+        progress = st.progress(0.0, text="Lade Bestelldaten tageweise ...")
+        day_costs, missing_dates = collect_day_costs(
+            dates, costs, accounts=accounts,
+            on_progress=lambda done: progress.progress(done / len(dates))
+        )
+        progress.empty()
+        if not day_costs:
             st.warning(f"Keine Daten für den ausgewählten Zeitraum verfügbar.")
             if missing_dates:
                 st.info(f"Fehlende Daten für folgende Tage: {', '.join(str(date) for date in missing_dates)}")
+            return
+        # Marktplätze aus den gecachten Kostensummen, die Bestellungen liegen nicht im Speicher
+        select_marketplace(marketplace_options(day_cost_platforms(day_costs)))
+        overview_data, stats = fold_day_costs(day_costs, st.session_state.selected_marketplace, costs)
+        st.caption(f"{stats['loaded_orders']} Bestellungen tageweise verarbeitet.")
+        
+        show_memory_report = st.checkbox("Speicherbedarf der Bestelldaten anzeigen (lädt alle Tage vollständig)")
+        if show_memory_report:
+            display_memory_report(dates, accounts)
+        
+        record_profile_tags(
+            start_date=st.session_state.start_date,
+            end_date=st.session_state.end_date,
+            marketplace=st.session_state.selected_marketplace,
+            accounts=",".join(accounts),
+            memory_report=show_memory_report,
+            loaded_orders=stats['loaded_orders'],
+            overview_rows=len(overview_data)
+        )
+        if overview_data.empty:
+            st.warning("Keine Daten für den ausgewählten Filter verfügbar.")
+            return
+        for currency, count in sorted(stats['missing_rates'].items()):
+            st.warning(f"Kein Wechselkurs für {currency} hinterlegt: {count} Bestellungen wurden nicht in EUR umgerechnet.")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            display_mode = st.radio("Darstellung", ["Kompakt (sortierbar)", "Klassisch (transponiert)"], horizontal=True)
+        with col2:
+            granularity = st.selectbox("Zeiteinheit", GRANULARITIES, disabled=display_mode != "Kompakt (sortierbar)")
+        
+        if display_mode == "Kompakt (sortierbar)":
+            # Numerische Tabelle, Formatierung erfolgt im Browser
+            display_overview_table(overview_data, granularity)
+        else:
+            # Transponiere die Daten und zeige sie an
+            transposed_data = transpose_overview_data(overview_data)
+            st.dataframe(transposed_data, height=600, use_container_width=True)
+        display_trend_charts(overview_data, granularity)
+        display_summary(overview_data)
         
     except Exception as e:
         st.error(f"Fehler beim Verarbeiten der Daten: {str(e)}")
         st.error("Bitte überprüfen Sie die Logs für weitere Details.")
 
 
+def refresh_affected_days(dates):
+    """Berechnet nach einer Kostenänderung nur die betroffenen, bereits berechneten Tage neu."""
+    if dates:
+        with st.spinner(f"Berechne {len(dates)} betroffene Tage neu ..."):
+            refresh_order_costs(dates)
+    st.success(f"Änderungen wurden gespeichert. {len(dates)} betroffene Tage neu berechnet.")
+
 def manage_material_costs():
     st.subheader("Materialkosten verwalten")
     
@@ -262,8 +374,13 @@ def manage_material_costs():
     )
     
     if st.button("Änderungen speichern"):
-        save_material_costs(edited_df)
-        st.success("Änderungen wurden gespeichert.")
+        refresh_affected_days(save_material_costs(edited_df))
+    
+    if st.button("Kostenindex neu aufbauen", help="Ordnet alle gespeicherten Bestellungen ihren SKUs und Plattformen zu"):
+        with st.spinner("Baue Kostenindex neu auf ..."):
+            for account in get_accounts():
+                index = rebuild_cost_index(account)
+                st.success(f"Kostenindex für {account} mit {len(index['partitions'])} Tagen und {len(index['skus'])} SKUs aufgebaut.")
 
 def extract_skus_and_quantities(order_items):
     try:
@@ -279,89 +396,6 @@ def extract_skus_and_quantities(order_items):
         logger.error(f"Problematische order_items: {order_items}")
         return []
 
-def calculate_overview_data(billbee_data, material_costs, fulfillment_costs, transaction_costs, selected_marketplace=None, selected_country=None):
-    try:
-        # Erstelle eine explizite Kopie des DataFrames
-        df = billbee_data.copy()
-        
-        df['CreatedAt'] = pd.to_datetime(df['CreatedAt']).dt.date
-        df['OrderItems'] = df['OrderItems'].apply(json.loads)
-        
-        # Filter nach Marktplatz und Land
-        if selected_marketplace:
-            df = df[df['Platform'] == selected_marketplace]
-        if selected_country:
-            df = df[df['CustomerCountry'] == selected_country]
-        
-        # Berechne Materialkosten
-        def calculate_material_cost(order_items):
-            return sum(material_costs.get(item['SKU'], 0) * item['Quantity'] for item in order_items)
-        
-        df['MaterialCost'] = df['OrderItems'].apply(calculate_material_cost)
-        
-        # Berechne Fulfillment-Kosten
-        df['FulfillmentCost'] = (
-            fulfillment_costs['Auftragspauschale'].iloc[0] +
-            fulfillment_costs['SKU_Pick'].iloc[0] * df['OrderItems'].apply(lambda x: sum(item['Quantity'] for item in x)) +
-            fulfillment_costs['Kartonage'].iloc[0]
-        )
-        
-        # Berechne Versandkosten
-        df['ShippingCost'] = df.apply(lambda row: calculate_shipping_costs(row['TotalOrderWeight'], row['CustomerCountry']), axis=1)
-        
-        # Berechne Transaktionskosten
-        transaction_cost_dict = dict(zip(transaction_costs['Platform'], transaction_costs['TransactionCostPercent']))
-        df['TransactionCost'] = df.apply(lambda row: row['TotalOrderPrice'] * transaction_cost_dict.get(row['Platform'], 0) / 100, axis=1)
-        
-        # Gruppiere die Daten nach Datum
-        grouped = df.groupby('CreatedAt').agg({
-            'TotalOrderPrice': 'sum',
-            'TaxAmount': 'sum',
-            'MaterialCost': 'sum',
-            'FulfillmentCost': 'sum',
-            'ShippingCost': 'sum',
-            'TransactionCost': 'sum'
-        }).reset_index()
-        
-        # Berechne die zusätzlichen Metriken
-        grouped['UmsatzNetto'] = grouped['TotalOrderPrice'] - grouped['TaxAmount']
-        grouped['MaterialkostenProzent'] = (grouped['MaterialCost'] / grouped['UmsatzNetto']) * 100
-        grouped['Deckungsbeitrag1'] = grouped['UmsatzNetto'] - grouped['MaterialCost']
-        grouped['GesamtkostenFulfillment'] = grouped['FulfillmentCost'] + grouped['ShippingCost']
-        grouped['GesamtkostenFulfillmentProzent'] = (grouped['GesamtkostenFulfillment'] / grouped['UmsatzNetto']) * 100
-        grouped['TransaktionskostenProzent'] = (grouped['TransactionCost'] / grouped['UmsatzNetto']) * 100
-        grouped['Deckungsbeitrag2'] = grouped['Deckungsbeitrag1'] - grouped['GesamtkostenFulfillment'] - grouped['TransactionCost']
-        
-        # Formatiere die Tabelle
-        result = grouped.rename(columns={
-            'CreatedAt': 'Datum',
-            'TotalOrderPrice': 'Umsatz Brutto',
-            'UmsatzNetto': 'Umsatz Netto',
-            'MaterialCost': 'Materialkosten',
-            'MaterialkostenProzent': 'Materialkosten %',
-            'Deckungsbeitrag1': 'Deckungsbeitrag 1',
-            'FulfillmentCost': 'Fulfillment-Kosten',
-            'ShippingCost': 'Versandkosten',
-            'GesamtkostenFulfillment': 'Gesamtkosten Fulfillment €',
-            'GesamtkostenFulfillmentProzent': 'Gesamtkosten Fulfillment %',
-            'TransactionCost': 'Transaktionskosten',
-            'TransaktionskostenProzent': 'Transaktionskosten %',
-            'Deckungsbeitrag2': 'Deckungsbeitrag 2'
-        })
-        
-        # Runde die Zahlen
-        for col in ['Umsatz Brutto', 'Umsatz Netto', 'Materialkosten', 'Deckungsbeitrag 1', 
-                    'Fulfillment-Kosten', 'Versandkosten', 'Gesamtkosten Fulfillment €', 
-                    'Transaktionskosten', 'Deckungsbeitrag 2']:
-            result[col] = result[col].round(2)
-        for col in ['Materialkosten %', 'Gesamtkosten Fulfillment %', 'Transaktionskosten %']:
-            result[col] = result[col].round(1)
-        
-        return result
-    except Exception as e:
-        logger.error(f"Fehler bei der Berechnung der Übersichtsdaten: {str(e)}", exc_info=True)
-        raise
-
 def transpose_overview_data(overview_data):
     # Entferne die TaxAmount Spalte
     overview_data = overview_data.drop('TaxAmount', axis=1, errors='ignore')
@@ -447,19 +481,22 @@ def display_summary(overview_data):
         st.write("Keine Daten zur Berechnung der Margen verfügbar.")
 
 
-def fetch_and_process_data(date):
+def fetch_and_process_data(date, priority="interactive", account=None):
     try:
-        orders_data = billbee_api.get_orders_for_date(date)
+        api = billbee_api if account is None else BillbeeAPI(account)
+        orders_data = api.get_orders_for_date(date, priority=priority)
         processed_orders = process_orders(orders_data)
         df = create_dataframe(processed_orders)
         
         filename = f"billbee_orders_{date.strftime('%Y-%m-%d')}.csv"
+        if api.account != DEFAULT_ACCOUNT:
+            filename = f"billbee_orders_{api.account}_{date.strftime('%Y-%m-%d')}.csv"
         save_to_csv(df, filename)
         
-        # Save to S3
-        s3_path = save_to_s3(df, date)
+        # Nur neue oder geänderte Bestellungen in S3 schreiben, stornierte entfernen
+        changed_count = upsert_to_s3(df, date, account=api.account, removed_ids=removed_order_ids(orders_data))
         
-        st.success(f"Daten für {date} erfolgreich abgerufen, verarbeitet und gespeichert.")
+        st.success(f"Daten für {date} erfolgreich abgerufen, verarbeitet und gespeichert ({changed_count} neue oder geänderte Bestellungen).")
         return df
     except Exception as e:
         st.error(f"Fehler beim Abrufen und Verarbeiten der Daten für {date}. Bitte überprüfen Sie die Logs für weitere Details.")
@@ -480,8 +517,7 @@ def manage_transaction_costs():
     )
     
     if st.button("Änderungen speichern"):
-        save_transaction_costs(edited_df)
-        st.success("Änderungen wurden gespeichert.")
+        refresh_affected_days(save_transaction_costs(edited_df))
 
 
 def manage_fulfillment_costs():
@@ -501,8 +537,7 @@ def manage_fulfillment_costs():
     )
     
     if st.button("Änderungen speichern"):
-        save_fulfillment_costs(edited_df)
-        st.success("Änderungen wurden gespeichert.")
+        refresh_affected_days(save_fulfillment_costs(edited_df))
 
 def manage_marketing_costs():
     st.subheader("Marketingkosten verwalten")
@@ -525,6 +560,37 @@ def manage_marketing_costs():
         save_marketing_costs(edited_df)
         st.success("Änderungen wurden gespeichert.")
 
+def manage_exchange_rates():
+    st.subheader("Wechselkurse verwalten")
+    st.caption("Kurs = Einheiten der Fremdwährung pro 1 EUR. Es gilt jeweils der letzte Kurs bis zum Bestelldatum.")
+    
+    rates = load_exchange_rates().copy()
+    rates['Date'] = rates['Date'].dt.date
+    
+    edited_df = st.data_editor(
+        rates,
+        column_config={
+            "Date": st.column_config.DateColumn("Datum"),
+            "Currency": st.column_config.TextColumn("Währung"),
+            "Rate": st.column_config.NumberColumn("Kurs", min_value=0, step=0.0001, format="%.4f"),
+        },
+        num_rows="dynamic"
+    )
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Änderungen speichern"):
+            save_exchange_rates(edited_df)
+            st.success("Änderungen wurden gespeichert.")
+    with col2:
+        file_path = st.text_input("Lokale Kursdatei", LOCAL_EXCHANGE_RATES_FILE)
+        if st.button("Aus Datei importieren"):
+            try:
+                imported = import_exchange_rates_from_file(file_path)
+                st.success(f"{len(imported)} Wechselkurse importiert.")
+            except Exception as e:
+                st.error(f"Fehler beim Import der Wechselkurse: {str(e)}")
+
 def main():
     st.title("E-Commerce Profitabilitäts-App")
     
@@ -532,16 +598,28 @@ def main():
     st.sidebar.title("Navigation")
     main_menu = st.sidebar.selectbox("Hauptmenü", ["Daten", "Übersicht", "Inventory Management"])
     
+    # Nächtlicher Import und Cache-Aufwärmen laufen im Hintergrund
+    job_scheduler = get_job_scheduler()
+    if job_scheduler is not None:
+        display_job_status(job_scheduler)
+    st.sidebar.toggle("Profiling (Laufzeitanalyse)", key=PROFILE_TOGGLE_KEY)
+    
     if main_menu == "Daten":
-        data_option = st.sidebar.radio("Daten Optionen", ["Daten von gestern abrufen", "Daten für Zeitraum abrufen"])
+        data_option = st.sidebar.radio("Daten Optionen", ["Daten von gestern abrufen", "Daten für Zeitraum abrufen", "Profit-Export je Bestellung"])
         
         if data_option == "Daten von gestern abrufen":
             st.subheader("Daten von gestern abrufen")
-            if st.button("Abrufen"):
+            accounts = select_accounts("fetch_account")
+            if not accounts:
+                st.error("Kein Billbee-Konto konfiguriert.")
+            elif st.button("Abrufen"):
                 yesterday = datetime.now().date() - timedelta(days=1)
-                df = fetch_and_process_data(yesterday)
-                if df is not None:
-                    st.write(df)
+                if len(accounts) > 1:
+                    st.write(fetch_all_accounts([yesterday], accounts))
+                else:
+                    df = fetch_and_process_data(yesterday, account=accounts[0])
+                    if df is not None:
+                        st.write(df)
         
         elif data_option == "Daten für Zeitraum abrufen":
             st.subheader("Daten für Zeitraum abrufen")
@@ -550,11 +628,22 @@ def main():
                 start_date = st.date_input("Startdatum", datetime.now().date() - timedelta(days=7))
             with col2:
                 end_date = st.date_input("Enddatum", datetime.now().date() - timedelta(days=1))
+            accounts = select_accounts("fetch_range_account")
             
-            if st.button("Daten abrufen"):
-                df = fetch_data_for_range(start_date, end_date)
-                if df is not None:
-                    st.write(df)
+            if not accounts:
+                st.error("Kein Billbee-Konto konfiguriert.")
+            elif st.button("Daten abrufen"):
+                if len(accounts) > 1:
+                    dates = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+                    # Zeitraum-Abrufe laufen als Batch, damit Einzelabrufe anderer Nutzer Vorrang haben
+                    st.write(fetch_all_accounts(dates, accounts, priority="batch"))
+                else:
+                    df = fetch_data_for_range(start_date, end_date, account=accounts[0])
+                    if df is not None:
+                        st.write(df)
+        
+        elif data_option == "Profit-Export je Bestellung":
+            display_profit_export_page()
     
     elif main_menu == "Übersicht":
         display_overview_page()
@@ -564,7 +653,8 @@ def main():
             "Materialkosten verwalten",
             "Fulfillment-Kosten verwalten",
             "Transaktionskosten verwalten",
-            "Marketingkosten verwalten"
+            "Marketingkosten verwalten",
+            "Wechselkurse verwalten"
         ])
         
         if inventory_option == "Materialkosten verwalten":
@@ -575,6 +665,12 @@ def main():
             manage_transaction_costs()
         elif inventory_option == "Marketingkosten verwalten":
             manage_marketing_costs()
+        elif inventory_option == "Wechselkurse verwalten":
+            manage_exchange_rates()
 
 if __name__ == "__main__":
-    main()
+    # Ohne Profiling wird main() direkt aufgerufen, es entsteht kein Mehraufwand
+    if profiling_requested():
+        run_profiled(main)
+    else:
+        main()
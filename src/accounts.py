@@ -0,0 +1,48 @@
+import streamlit as st
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Das bisherige Einzelkonto aus st.secrets["billbee"]; seine Daten liegen weiter im Bucket-Stamm
+DEFAULT_ACCOUNT = "default"
+ACCOUNTS_PREFIX = "accounts"
+ALL_ACCOUNTS_LABEL = "Alle Shops"
+
+def get_accounts():
+    """
+    Liefert die Namen aller konfigurierten Billbee-Konten. Neben dem bisherigen
+    Konto st.secrets["billbee"] können weitere Shops unter
+    st.secrets["billbee_accounts"][<name>] hinterlegt werden.
+    """
+    accounts = []
+    if "billbee" in st.secrets:
+        accounts.append(DEFAULT_ACCOUNT)
+    accounts.extend(name for name in st.secrets.get("billbee_accounts", {}) if name != DEFAULT_ACCOUNT)
+    return accounts
+
+def resolve_account(account=None):
+    """Ersetzt None durch das Standardkonto (bzw. das erste konfigurierte Konto)."""
+    if account is not None:
+        return account
+    accounts = get_accounts()
+    return DEFAULT_ACCOUNT if DEFAULT_ACCOUNT in accounts or not accounts else accounts[0]
+
+def get_account_credentials(account=None):
+    account = resolve_account(account)
+    if account == DEFAULT_ACCOUNT:
+        return st.secrets["billbee"]
+    return st.secrets["billbee_accounts"][account]
+
+def account_prefix(account=None):
+    """S3-Präfix der Partitionen eines Kontos; das Standardkonto bleibt im Bucket-Stamm."""
+    bucket_name = st.secrets['aws']['S3_BUCKET_NAME']
+    account = resolve_account(account)
+    if account == DEFAULT_ACCOUNT:
+        return bucket_name
+    return f"{bucket_name}/{ACCOUNTS_PREFIX}/{account}"
+
+def selected_accounts(selection):
+    """Übersetzt die Auswahl im UI ("Alle Shops" oder ein Kontoname) in eine Kontenliste."""
+    if selection in (None, ALL_ACCOUNTS_LABEL):
+        return get_accounts()
+    return [selection]
@@ -0,0 +1,172 @@
+import threading
+import time
+import logging
+from datetime import datetime, timedelta
+import pandas as pd
+import streamlit as st
+from src.ingest import ingest_all_accounts
+from src.overview import load_overview_costs, collect_day_costs, day_cost_platforms, costs_missing
+from src.cache import cache_stats
+from src.live_view import close_live_days
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NIGHTLY_TIME = "03:00"
+# Zeiträume (in Tagen bis gestern), die nach dem Import vorberechnet werden
+WARM_UP_RANGES = (7, 30, 90)
+
+class JobScheduler:
+    """
+    Schließt die Live-Stände des Vortags ab und führt den nächtlichen Import und
+    das anschließende Aufwärmen der Caches in einem Hintergrund-Thread des
+    Streamlit-Prozesses aus.
+    """
+
+    def __init__(self, nightly_time=DEFAULT_NIGHTLY_TIME, warm_up_ranges=WARM_UP_RANGES):
+        hour, minute = (int(part) for part in nightly_time.split(":"))
+        self.nightly_time = (hour, minute)
+        self.warm_up_ranges = warm_up_ranges
+        self.jobs = {
+            "Live-Tag abschließen": self.close_live_days,
+            "Nächtlicher Import": self.ingest_yesterday,
+            "Caches aufwärmen": self.warm_caches,
+        }
+        self.status = {name: {'state': 'geplant', 'last_start': None, 'last_duration': None, 'last_error': None, 'details': ''}
+                       for name in self.jobs}
+        self.next_run = None
+        self._run_lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="nightly-jobs", daemon=True)
+            self._thread.start()
+            logger.info("Hintergrundjobs gestartet")
+
+    def run_all(self):
+        """Führt alle Jobs nacheinander aus; parallele Läufe werden übersprungen."""
+        if not self._run_lock.acquire(blocking=False):
+            logger.info("Hintergrundjobs laufen bereits")
+            return
+        try:
+            for name in self.jobs:
+                self._run_job(name)
+        finally:
+            self._run_lock.release()
+
+    def trigger(self):
+        """Startet alle Jobs sofort in einem eigenen Thread."""
+        threading.Thread(target=self.run_all, name="nightly-jobs-manual", daemon=True).start()
+
+    def is_running(self):
+        return self._run_lock.locked()
+
+    def close_live_days(self):
+        results = close_live_days()
+        if not results:
+            return "Keine offenen Live-Stände"
+        details = []
+        for (account, day), result in results.items():
+            if isinstance(result, Exception):
+                details.append(f"{account} {day}: Fehler ({result})")
+            else:
+                details.append(f"{account} {day}: {result} neu, geändert oder entfernt")
+        summary = "; ".join(details)
+        if any(isinstance(result, Exception) for result in results.values()):
+            raise RuntimeError(summary)
+        return summary
+
+    def ingest_yesterday(self):
+        yesterday = datetime.now().date() - timedelta(days=1)
+        results = ingest_all_accounts(yesterday, priority="batch")
+        details = []
+        for account, result in results.items():
+            if isinstance(result, Exception):
+                details.append(f"{account}: Fehler ({result})")
+            else:
+                details.append(f"{account}: {result[0]} Bestellungen, {result[1]} neu oder geändert")
+        summary = f"{yesterday}: " + "; ".join(details)
+        if any(isinstance(result, Exception) for result in results.values()):
+            raise RuntimeError(summary)
+        return summary
+
+    def warm_caches(self):
+        costs = load_overview_costs()
+        if costs_missing(costs):
+            return "Übersprungen: Kostentabellen fehlen"
+        end_date = datetime.now().date() - timedelta(days=1)
+        dates = [end_date - timedelta(days=offset) for offset in range(max(self.warm_up_ranges) - 1, -1, -1)]
+
+        # Die Übersicht wird aus den Kostensummen je Konto und Tag gebildet; sind
+        # diese gecacht, ist jeder Zeitraum und Marktplatz ohne S3-Zugriff berechenbar
+        day_costs, missing_dates = collect_day_costs(dates, costs)
+        return f"Kostensummen für {len(dates) - len(missing_dates)} Tage vorberechnet ({len(day_cost_platforms(day_costs))} Plattformen)"
+
+    def _run_job(self, name):
+        status = self.status[name]
+        status.update(state='läuft', last_start=datetime.now(), last_error=None)
+        started = time.perf_counter()
+        try:
+            status['details'] = self.jobs[name]() or ''
+            status['state'] = 'ok'
+        except Exception as e:
+            logger.error(f"Hintergrundjob '{name}' fehlgeschlagen: {str(e)}", exc_info=True)
+            status.update(state='fehler', last_error=str(e))
+        finally:
+            status['last_duration'] = time.perf_counter() - started
+
+    def _seconds_until_next_run(self):
+        now = datetime.now()
+        next_run = now.replace(hour=self.nightly_time[0], minute=self.nightly_time[1], second=0, microsecond=0)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        self.next_run = next_run
+        return (next_run - now).total_seconds()
+
+    def _loop(self):
+        while True:
+            time.sleep(self._seconds_until_next_run())
+            self.run_all()
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_job_scheduler():
+    """
+    Liefert den prozessweiten Job-Scheduler und startet ihn beim ersten Aufruf.
+    Konfiguration über st.secrets["scheduler"]: ENABLED, NIGHTLY_TIME ("HH:MM").
+    Gibt None zurück, wenn der Scheduler deaktiviert ist.
+    """
+    global _scheduler
+    config = st.secrets.get("scheduler", {})
+    if not config.get("ENABLED", True):
+        return None
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler(nightly_time=config.get("NIGHTLY_TIME", DEFAULT_NIGHTLY_TIME))
+            _scheduler.start()
+        return _scheduler
+
+def display_job_status(scheduler):
+    """Zeigt Status und Laufzeiten der Hintergrundjobs in der Sidebar."""
+    with st.sidebar.expander("Hintergrundjobs"):
+        if scheduler.next_run:
+            st.caption(f"Nächster Lauf: {scheduler.next_run:%d.%m.%Y %H:%M}")
+        rows = []
+        for name, status in scheduler.status.items():
+            rows.append({
+                'Job': name,
+                'Status': status['state'],
+                'Letzter Start': f"{status['last_start']:%d.%m. %H:%M}" if status['last_start'] else '–',
+                'Dauer (s)': round(status['last_duration'], 1) if status['last_duration'] is not None else None,
+            })
+        st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+        for name, status in scheduler.status.items():
+            if status['last_error']:
+                st.error(f"{name}: {status['last_error']}")
+            elif status['details']:
+                st.caption(f"{name}: {status['details']}")
+        st.dataframe(pd.DataFrame(cache_stats()), hide_index=True, use_container_width=True)
+        if st.button("Jetzt ausführen", disabled=scheduler.is_running()):
+            scheduler.trigger()
+            st.info("Hintergrundjobs gestartet.")
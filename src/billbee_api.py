@@ -2,28 +2,64 @@ import requests
 from datetime import datetime, timedelta
 import streamlit as st
 import logging
+from src.request_scheduler import get_scheduler, DEFAULT_REQUESTS_PER_SECOND, DEFAULT_BURST
+from src.accounts import get_account_credentials, resolve_account
 
 logger = logging.getLogger(__name__)
 
 class BillbeeAPI:
     BASE_URL = "https://api.billbee.io/api/v1"
 
-    def __init__(self):
-        self.api_key = st.secrets["billbee"]["API_KEY"]
-        self.username = st.secrets["billbee"]["USERNAME"]
-        self.password = st.secrets["billbee"]["PASSWORD"]
+    def __init__(self, account=None):
+        self.account = resolve_account(account)
+        credentials = get_account_credentials(self.account)
+        self.api_key = credentials["API_KEY"]
+        self.username = credentials["USERNAME"]
+        self.password = credentials["PASSWORD"]
+        # Alle Instanzen mit denselben Zugangsdaten teilen sich Ratenlimit und laufende Abrufe;
+        # jedes Konto hat damit sein eigenes Budget
+        self.scheduler = get_scheduler(
+            (self.api_key, self.username),
+            rate=float(credentials.get("REQUESTS_PER_SECOND", DEFAULT_REQUESTS_PER_SECOND)),
+            burst=int(credentials.get("BURST", DEFAULT_BURST))
+        )
 
-    def get_orders_for_date(self, date):
-        endpoint = f"{self.BASE_URL}/orders"
-        headers = {
-            "X-Billbee-Api-Key": self.api_key,
-            "Content-Type": "application/json"
+    def get_orders_for_date(self, date, priority="interactive"):
+        """
+        Holt alle Bestellungen eines Tages. Gleichzeitige Abrufe desselben Tages
+        werden zu einem Abruf zusammengefasst.
+        """
+        return self.scheduler.coalesce(("orders", date.isoformat()), self._fetch_orders_for_date, date, priority)
+
+    def get_orders_modified_since(self, since, priority="interactive"):
+        """
+        Holt alle Bestellungen, die seit `since` angelegt oder geändert wurden
+        (Delta-Abruf für die Live-Ansicht).
+        """
+        params = {
+            "modifiedAtMin": since.isoformat(),
+            "pageSize": 250  # Max page size
         }
+        orders = self._fetch_pages(params, priority)
+        logger.info(f"Successfully retrieved {len(orders)} orders modified since {since}")
+        return orders
+
+    def _fetch_orders_for_date(self, date, priority):
         params = {
             "minOrderDate": date.isoformat(),
             "maxOrderDate": (date + timedelta(days=1)).isoformat(),
             "pageSize": 250  # Max page size
         }
+        orders = self._fetch_pages(params, priority)
+        logger.info(f"Successfully retrieved {len(orders)} orders for date {date}")
+        return orders
+
+    def _fetch_pages(self, params, priority):
+        endpoint = f"{self.BASE_URL}/orders"
+        headers = {
+            "X-Billbee-Api-Key": self.api_key,
+            "Content-Type": "application/json"
+        }
 
         all_orders = []
         page = 1
@@ -31,7 +67,10 @@ class BillbeeAPI:
         try:
             while True:
                 params['page'] = page
-                response = requests.get(endpoint, headers=headers, params=params, auth=(self.username, self.password))
+                response = self.scheduler.run(
+                    requests.get, endpoint, headers=headers, params=dict(params),
+                    auth=(self.username, self.password), priority=priority
+                )
                 response.raise_for_status()
                 data = response.json()
 
@@ -42,7 +81,6 @@ class BillbeeAPI:
 
                 page += 1
 
-            logger.info(f"Successfully retrieved {len(all_orders)} orders for date {date}")
             return all_orders
 
         except requests.RequestException as e:
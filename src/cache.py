@@ -0,0 +1,164 @@
+import sys
+import threading
+import logging
+from collections import OrderedDict
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+def estimate_size(value):
+    """Geschätzter Speicherbedarf eines Cache-Werts in Bytes."""
+    if value is None:
+        return 0
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    return sys.getsizeof(value)
+
+class MemoryCache:
+    """
+    Threadsicherer In-Memory-Cache mit optionaler LRU-Begrenzung nach Anzahl
+    Einträgen und/oder Bytes. Gilt prozessweit, also für alle Streamlit-Sitzungen
+    und Hintergrundjobs. Zurückgegebene Werte werden geteilt und dürfen nicht
+    verändert werden.
+    """
+
+    def __init__(self, name, max_entries=None, max_bytes=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._data = OrderedDict()
+        self._sizes = {}
+        # Laufende Berechnungen je Schlüssel und deren Generation; invalidate()
+        # erhöht die Generation, damit veraltete Ergebnisse nicht gespeichert werden
+        self._inflight = {}
+        self._generations = {}
+        self._lock = threading.RLock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                logger.debug(f"Cache '{self.name}': Eintrag mit {size} Bytes ist zu groß und wird nicht gespeichert")
+                return
+            self._data[key] = value
+            self._sizes[key] = size
+            self.bytes += size
+            while self._data and ((self.max_entries is not None and len(self._data) > self.max_entries)
+                                  or (self.max_bytes is not None and self.bytes > self.max_bytes)):
+                self._remove(next(iter(self._data)))
+
+    def _remove(self, key):
+        del self._data[key]
+        self.bytes -= self._sizes.pop(key)
+
+    def get_or_compute(self, key, compute):
+        """
+        Liefert den gecachten Wert oder berechnet und speichert ihn (auch None).
+        Wird der Schlüssel während der Berechnung verworfen, wird das Ergebnis
+        zurückgegeben, aber nicht gespeichert.
+        """
+        with self._lock:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            generation = self._generations.get(key, 0)
+            self._inflight[key] = self._inflight.get(key, 0) + 1
+        try:
+            value = compute()
+            with self._lock:
+                if self._generations.get(key, 0) == generation:
+                    self.set(key, value)
+                else:
+                    logger.info(f"Cache '{self.name}': Ergebnis für {key} während der Berechnung verworfen")
+            return value
+        finally:
+            with self._lock:
+                self._inflight[key] -= 1
+                if not self._inflight[key]:
+                    del self._inflight[key]
+                    self._generations.pop(key, None)
+
+    def invalidate(self, predicate=None):
+        """Entfernt alle Einträge bzw. die, deren Schlüssel `predicate` erfüllen."""
+        with self._lock:
+            keys = [key for key in self._data if predicate is None or predicate(key)]
+            for key in keys:
+                self._remove(key)
+            for key in self._inflight:
+                if predicate is None or predicate(key):
+                    self._generations[key] = self._generations.get(key, 0) + 1
+        if keys:
+            logger.info(f"Cache '{self.name}': {len(keys)} Einträge verworfen")
+        return keys
+
+    def keys(self):
+        with self._lock:
+            return list(self._data.keys())
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            return {'Cache': self.name, 'Einträge': len(self._data), 'MB': round(self.bytes / 1024 / 1024, 1),
+                    'Treffer': self.hits, 'Fehlzugriffe': self.misses}
+
+# Geladene Bestellpartitionen je (Konto, Tag); nur für die Ansicht mit allen
+# Bestellungen im Speicher, die blockweise Übersicht lädt am Cache vorbei
+day_frame_cache = MemoryCache("Bestelldaten je Tag", max_bytes=64 * 1024 * 1024)
+# Kostentabellen (Material, Fulfillment, Transaktion, Marketing, Wechselkurse)
+cost_cache = MemoryCache("Kostentabellen")
+# Kostensummen je (Konto, Tag), verdichtet nach Plattform und Währung
+order_cost_cache = MemoryCache("Kostensummen je Tag", max_bytes=16 * 1024 * 1024)
+
+def invalidate_cost_caches(derived=True, dates=None):
+    """
+    Verwirft die Kostentabellen nach einer Änderung. Mit derived=True werden
+    auch die daraus berechneten Bestellkosten verworfen, mit `dates` nur die
+    der betroffenen (Konto, Tag)-Schlüssel. Gibt die verworfenen Schlüssel zurück.
+    """
+    cost_cache.invalidate()
+    if not derived:
+        return []
+    if dates is None:
+        return order_cost_cache.invalidate()
+    dates = set(dates)
+    return order_cost_cache.invalidate(lambda key: key in dates)
+
+def invalidate_dates(dates, account):
+    """Verwirft alle Daten, die aus den Partitionen der angegebenen Tage eines Kontos abgeleitet sind."""
+    keys = {(account, date) for date in dates}
+    day_frame_cache.invalidate(lambda key: key in keys)
+    order_cost_cache.invalidate(lambda key: key in keys)
+
+def clear_caches():
+    """Leert alle prozessweiten Caches (z.B. zwischen Benchmark-Läufen)."""
+    for cache in (day_frame_cache, cost_cache, order_cost_cache):
+        cache.invalidate()
+
+def cache_stats():
+    return [cache.stats() for cache in (day_frame_cache, cost_cache, order_cost_cache)]
@@ -0,0 +1,76 @@
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+import logging
+from src.overview_table import bucket_overview_data, choose_granularity
+
+logger = logging.getLogger(__name__)
+
+# Obergrenze der Punkte, die pro Zeitreihe an den Browser gehen
+MAX_POINTS_PER_SERIES = 400
+
+REVENUE_SERIES = ['Umsatz Netto', 'Deckungsbeitrag 1', 'Deckungsbeitrag 2', 'Deckungsbeitrag 3']
+COST_SHARE_SERIES = ['Materialkosten %', 'Gesamtkosten Fulfillment %', 'Transaktionskosten %', 'Marketingkosten %']
+
+def downsample_lttb(x, y, threshold=MAX_POINTS_PER_SERIES):
+    """
+    Largest-Triangle-Three-Buckets: wählt `threshold` Punkte so aus, dass die
+    Form der Kurve inklusive Spitzen und Täler erhalten bleibt.
+    Gibt die Indizes der ausgewählten Punkte zurück.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+    bucket_size = (n - 2) / (threshold - 2)
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+def build_trend_figure(data, series, title, tick_suffix, max_points=MAX_POINTS_PER_SERIES):
+    """Erstellt ein Liniendiagramm, jede Reihe wird auf max_points Punkte reduziert."""
+    fig = go.Figure()
+    x_values = data['Datum'].astype('int64').to_numpy()
+    for col in series:
+        if col not in data.columns:
+            continue
+        idx = downsample_lttb(x_values, data[col].to_numpy(), max_points)
+        fig.add_trace(go.Scattergl(
+            x=data['Datum'].iloc[idx],
+            y=data[col].iloc[idx],
+            mode='lines',
+            name=col
+        ))
+    fig.update_layout(
+        title=title,
+        hovermode='x unified',
+        yaxis_ticksuffix=tick_suffix,
+        legend=dict(orientation='h'),
+        margin=dict(l=10, r=10, t=50, b=10)
+    )
+    return fig
+
+def display_trend_charts(overview_data, granularity="Automatisch"):
+    """Zeigt Umsatz, DB1–DB3 und Kostenanteile als interaktive Zeitreihen."""
+    if granularity == "Automatisch":
+        granularity = choose_granularity(overview_data['Datum'].nunique())
+    data = bucket_overview_data(overview_data, granularity)
+    data['Datum'] = data['Datum'].astype('datetime64[ns]')
+
+    st.plotly_chart(build_trend_figure(data, REVENUE_SERIES, f"Umsatz und Deckungsbeiträge ({granularity})", " €"), use_container_width=True)
+    st.plotly_chart(build_trend_figure(data, COST_SHARE_SERIES, f"Kostenanteile am Nettoumsatz ({granularity})", " %"), use_container_width=True)
@@ -0,0 +1,136 @@
+import pandas as pd
+import json
+import logging
+import threading
+from src.s3_utils import get_s3_fs, read_bytes_from_s3, write_bytes_to_s3
+from src.accounts import get_accounts, account_prefix, resolve_account
+
+logger = logging.getLogger(__name__)
+
+COST_INDEX_FILE = "cost_index.json"
+
+# Invertierter Index je Konto für gezielte Neuberechnung nach Kostenänderungen:
+#   skus:       SKU -> [Tage]
+#   platforms:  Plattform -> [Tage]
+#   partitions: alle Tage, die im Index erfasst sind
+# Die Abfragen liefern (Konto, Tag)-Schlüssel wie die Caches in src.cache.
+_index = {}
+_index_lock = threading.RLock()
+
+def _empty_index():
+    return {'skus': {}, 'platforms': {}, 'partitions': []}
+
+def load_cost_index(account=None, force_reload=False):
+    """Lädt den Index eines Kontos aus S3 und hält ihn im Speicher."""
+    account = resolve_account(account)
+    with _index_lock:
+        if account in _index and not force_reload:
+            return _index[account]
+        s3 = get_s3_fs()
+        full_path = f"{account_prefix(account)}/{COST_INDEX_FILE}"
+        try:
+            index = json.loads(read_bytes_from_s3(s3, full_path).decode('utf-8')) if s3.exists(full_path) else _empty_index()
+        except Exception as e:
+            logger.error(f"Fehler beim Laden des Kostenindex: {str(e)}")
+            raise
+        # Ältere Indizes führten je SKU und Tag die BillbeeIDs; nur die Tage werden gebraucht
+        index['skus'] = {sku: sorted(days) for sku, days in index['skus'].items()}
+        _index[account] = index
+        return index
+
+def save_cost_index(s3, account, index):
+    with _index_lock:
+        write_bytes_to_s3(s3, f"{account_prefix(account)}/{COST_INDEX_FILE}", json.dumps(index, separators=(',', ':')).encode('utf-8'))
+        _index[account] = index
+
+def _add_orders(index, df, partition):
+    """Trägt SKUs und Plattform der Bestellungen einer Tagespartition in den Index ein."""
+    for platform, order_items in zip(df['Platform'], df['OrderItems']):
+        for item in json.loads(order_items):
+            sku_days = index['skus'].setdefault(str(item['SKU']), [])
+            if partition not in sku_days:
+                sku_days.append(partition)
+        platform_days = index['platforms'].setdefault(str(platform), [])
+        if partition not in platform_days:
+            platform_days.append(partition)
+    if partition not in index['partitions']:
+        index['partitions'].append(partition)
+
+def update_cost_index(s3, account, df, partition):
+    """
+    Ergänzt den Index um neue oder geänderte Bestellungen. Veraltete Einträge
+    (z.B. entfernte Positionen) bleiben bestehen; sie führen höchstens zu einer
+    überflüssigen Neuberechnung, nie zu einer fehlenden.
+    """
+    with _index_lock:
+        index = load_cost_index(account)
+        _add_orders(index, df, partition)
+        save_cost_index(s3, account, index)
+
+def rebuild_cost_index(account=None):
+    """Baut den Index eines Kontos aus allen gespeicherten Bestellpartitionen neu auf."""
+    from src.s3_operations import load_from_s3
+    s3 = get_s3_fs()
+    account = resolve_account(account)
+    index = _empty_index()
+    for path in sorted(s3.glob(f"{account_prefix(account)}/billbee_orders_*.csv")):
+        partition = path.rsplit('billbee_orders_', 1)[1][:10]
+        df = load_from_s3(pd.Timestamp(partition).date(), use_cache=False, account=account)
+        if df is not None and not df.empty:
+            _add_orders(index, df, partition)
+    save_cost_index(s3, account, index)
+    logger.info(f"Kostenindex für '{account}' mit {len(index['partitions'])} Tagen und {len(index['skus'])} SKUs neu aufgebaut")
+    return index
+
+def _to_keys(account, partitions):
+    return {(account, pd.Timestamp(partition).date()) for partition in partitions}
+
+def dates_for_skus(skus):
+    """Alle (Konto, Tag), an denen eine der SKUs bestellt wurde."""
+    keys = set()
+    for account in get_accounts():
+        index = load_cost_index(account)
+        for sku in skus:
+            keys.update(_to_keys(account, index['skus'].get(str(sku), [])))
+    return keys
+
+def dates_for_platforms(platforms):
+    """Alle (Konto, Tag) mit Bestellungen einer der Plattformen."""
+    keys = set()
+    for account in get_accounts():
+        index = load_cost_index(account)
+        for platform in platforms:
+            keys.update(_to_keys(account, index['platforms'].get(str(platform), [])))
+    return keys
+
+def indexed_dates():
+    keys = set()
+    for account in get_accounts():
+        keys.update(_to_keys(account, load_cost_index(account)['partitions']))
+    return keys
+
+def changed_keys(old_df, new_df, key_column, value_column):
+    """Schlüssel, deren Wert zwischen zwei Kostentabellen hinzugekommen, entfallen oder geändert ist."""
+    def as_dict(df):
+        if df is None or df.empty:
+            return {}
+        return {str(key): value for key, value in zip(df[key_column], df[value_column])}
+    old, new = as_dict(old_df), as_dict(new_df)
+    changed = set()
+    for key in set(old) | set(new):
+        old_value, new_value = old.get(key), new.get(key)
+        if pd.isna(old_value) and pd.isna(new_value):
+            continue
+        if old_value != new_value:
+            changed.add(key)
+    return changed
+
+def affected_cached_dates(dates):
+    """
+    Ergänzt betroffene (Konto, Tag)-Schlüssel um gecachte Tage, die (noch) nicht
+    im Index stehen, damit deren Ergebnisse nach einer Kostenänderung nicht
+    veraltet bleiben.
+    """
+    from src.cache import order_cost_cache
+    known = indexed_dates()
+    return set(dates) | {key for key in order_cost_cache.keys() if key not in known}
@@ -4,6 +4,9 @@ import json
 
 logger = logging.getLogger(__name__)
 
+# Billbee-Bestellstatus, bei denen die Bestellung nicht mehr zum Umsatz zählt (gelöscht, storniert)
+REMOVED_ORDER_STATES = {6, 8}
+
 def process_sku(sku):
     """
     Process the SKU to remove everything after the hyphen (if present).
@@ -27,9 +30,19 @@ def safe_float(value):
     except (ValueError, TypeError):
         return 0.0
 
+def is_removed_order(order):
+    return order.get("State") in REMOVED_ORDER_STATES
+
+def removed_order_ids(orders_data):
+    """BillbeeIDs der gelöschten und stornierten Bestellungen."""
+    return {order["BillBeeOrderId"] for order in orders_data if is_removed_order(order)}
+
 def process_orders(orders_data):
+    """Bereitet Billbee-Bestellungen auf; gelöschte und stornierte Bestellungen werden übersprungen."""
     processed_orders = []
     for order in orders_data:
+        if is_removed_order(order):
+            continue
         processed_order = {
             "BillbeeID": order["BillBeeOrderId"],
             "OrderItems": [],
@@ -74,6 +87,19 @@ def create_dataframe(processed_orders):
     df = pd.DataFrame(prepare_data_for_csv(processed_orders))
     return df
 
+def deduplicate_orders(df, keep='last'):
+    """
+    Entfernt doppelte Bestellungen anhand der BillbeeID.
+    Bei Duplikaten gewinnt standardmäßig der zuletzt geladene Stand.
+    """
+    if df is None or df.empty or 'BillbeeID' not in df.columns:
+        return df
+    duplicates = df.duplicated(subset='BillbeeID', keep=keep)
+    if duplicates.any():
+        logger.info(f"{int(duplicates.sum())} doppelte Bestellungen entfernt")
+        return df[~duplicates].reset_index(drop=True)
+    return df
+
 def save_to_csv(df, filename):
     df.to_csv(filename, index=False)
     logger.info(f"Data saved to {filename}")
@@ -0,0 +1,149 @@
+import pandas as pd
+import numpy as np
+from src.s3_utils import get_s3_fs, read_csv_from_s3, write_csv_to_s3
+from src.cache import invalidate_cost_caches
+import streamlit as st
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+BASE_CURRENCY = "EUR"
+EXCHANGE_RATES_FILE = "exchange_rates.csv"
+LOCAL_EXCHANGE_RATES_FILE = "exchange_rates.csv"
+MONETARY_COLUMNS = ['TotalOrderPrice', 'TaxAmount', 'TotalCost']
+
+# Prozessweiter Cache der Kurstabelle, wird beim Speichern zurückgesetzt
+_rates_cache = {}
+_rates_lock = threading.Lock()
+
+def _empty_rates():
+    return pd.DataFrame({
+        'Date': pd.Series(dtype='datetime64[ns]'),
+        'Currency': pd.Series(dtype=object),
+        'Rate': pd.Series(dtype=float),
+    })
+
+def _normalize_rates(df):
+    """Bringt eine Kurstabelle (Date, Currency, Rate) in ein einheitliches Format."""
+    missing = {'Date', 'Currency', 'Rate'} - set(df.columns)
+    if missing:
+        raise ValueError(f"Wechselkurstabelle ohne Spalten: {', '.join(sorted(missing))}")
+    df = df[['Date', 'Currency', 'Rate']].dropna().copy()
+    df['Date'] = pd.to_datetime(df['Date']).astype('datetime64[ns]')
+    df['Currency'] = df['Currency'].astype(str).str.upper()
+    df['Rate'] = df['Rate'].astype(float)
+    return df.sort_values('Date').reset_index(drop=True)
+
+def load_exchange_rates(force_reload=False):
+    """
+    Lädt die tägliche Wechselkurstabelle aus S3. Rate = Einheiten der Währung pro 1 EUR.
+    Das Ergebnis wird im Speicher gehalten, bis force_reload gesetzt oder neu gespeichert wird.
+    """
+    with _rates_lock:
+        if not force_reload and 'rates' in _rates_cache:
+            return _rates_cache['rates']
+        s3 = get_s3_fs()
+        bucket_name = st.secrets['aws']['S3_BUCKET_NAME']
+        file_path = f"{bucket_name}/{EXCHANGE_RATES_FILE}"
+        try:
+            if s3.exists(file_path):
+                rates = _normalize_rates(read_csv_from_s3(s3, file_path))
+            else:
+                rates = _empty_rates()
+            _rates_cache['rates'] = rates
+            return rates
+        except Exception as e:
+            logger.error(f"Fehler beim Laden der Wechselkurse: {str(e)}")
+            raise
+
+def save_exchange_rates(df):
+    s3 = get_s3_fs()
+    bucket_name = st.secrets['aws']['S3_BUCKET_NAME']
+    file_path = f"{bucket_name}/{EXCHANGE_RATES_FILE}"
+    try:
+        rates = _normalize_rates(df)
+        write_csv_to_s3(s3, file_path, rates.assign(Date=rates['Date'].dt.strftime('%Y-%m-%d')))
+        with _rates_lock:
+            _rates_cache['rates'] = rates
+        invalidate_cost_caches()
+        return rates
+    except Exception as e:
+        logger.error(f"Fehler beim Speichern der Wechselkurse: {str(e)}")
+        raise
+
+def import_exchange_rates_from_file(file_path=LOCAL_EXCHANGE_RATES_FILE):
+    """Liest Wechselkurse aus einer lokalen CSV-Datei und legt sie in S3 ab."""
+    try:
+        return save_exchange_rates(pd.read_csv(file_path))
+    except Exception as e:
+        logger.error(f"Fehler beim Import der Wechselkurse aus {file_path}: {str(e)}")
+        raise
+
+def _lookup_rates(dates, currencies, rates):
+    """
+    Letzter Kurs je (Datum, Währung) bis zum Datum; NaN, wenn keiner vorliegt.
+    Bestellungen ohne gültiges Datum erhalten keinen Kurs.
+    """
+    result = np.full(len(dates), np.nan)
+    if rates is None or rates.empty or len(dates) == 0:
+        return result
+    orders = pd.DataFrame({
+        'Date': pd.to_datetime(dates, errors='coerce').astype('datetime64[ns]'),
+        'Currency': currencies,
+        'Position': np.arange(len(dates)),
+    })
+    # merge_asof verträgt keine fehlenden Schlüssel
+    orders = orders[orders['Date'].notna()].sort_values('Date')
+    if orders.empty:
+        return result
+    merged = pd.merge_asof(orders, rates[['Date', 'Currency', 'Rate']], on='Date', by='Currency', direction='backward')
+    result[merged['Position'].to_numpy()] = merged['Rate'].to_numpy()
+    return result
+
+def _foreign_mask(df):
+    currencies = df['Currency'].astype(str).str.upper()
+    return currencies, (currencies != BASE_CURRENCY) & df['Currency'].notna()
+
+def missing_rate_mask(df, rates, date_column='CreatedAt'):
+    """Markiert Fremdwährungs-Bestellungen, für die bis zum Bestelldatum kein Kurs vorliegt."""
+    mask = np.zeros(len(df), dtype=bool)
+    if df.empty or 'Currency' not in df.columns:
+        return mask
+    currencies, foreign = _foreign_mask(df)
+    if foreign.any():
+        positions = np.flatnonzero(foreign.to_numpy())
+        mask[positions] = np.isnan(_lookup_rates(df.loc[foreign, date_column].to_numpy(), currencies[foreign].to_numpy(), rates))
+    return mask
+
+def missing_rate_currencies(df, rates, date_column='CreatedAt'):
+    """Anzahl Bestellungen je Fremdwährung, für die bis zum Bestelldatum kein Kurs vorliegt."""
+    mask = missing_rate_mask(df, rates, date_column)
+    if not mask.any():
+        return {}
+    return df.loc[mask, 'Currency'].astype(str).str.upper().value_counts().to_dict()
+
+def convert_to_eur(df, rates, columns=MONETARY_COLUMNS, date_column='CreatedAt'):
+    """
+    Rechnet die Geldspalten aller Nicht-EUR-Bestellungen in EUR um.
+    Je Bestellung wird der letzte verfügbare Kurs zum Bestelldatum verwendet
+    (As-of-Join über Datum und Währung). Ohne Kurs bleibt der Betrag unverändert.
+    """
+    if df.empty or 'Currency' not in df.columns:
+        return df
+    currencies, foreign = _foreign_mask(df)
+    if not foreign.any():
+        return df
+
+    rate = np.ones(len(df))
+    foreign_rates = _lookup_rates(df.loc[foreign, date_column].to_numpy(), currencies[foreign].to_numpy(), rates)
+    missing = np.isnan(foreign_rates)
+    rate[np.flatnonzero(foreign.to_numpy())] = np.where(missing, 1.0, foreign_rates)
+
+    if missing.any():
+        logger.warning(f"Kein Wechselkurs für {int(missing.sum())} Bestellungen gefunden, Beträge bleiben unverändert")
+
+    for col in columns:
+        if col in df.columns:
+            df[col] = df[col].astype(float) / rate
+    return df
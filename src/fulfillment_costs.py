@@ -1,5 +1,6 @@
 import pandas as pd
-from src.s3_utils import get_s3_fs
+from src.s3_utils import get_s3_fs, read_csv_from_s3, write_csv_to_s3
+from src.cache import invalidate_cost_caches
 import streamlit as st
 import logging
 
@@ -11,9 +12,8 @@ def load_fulfillment_costs():
     file_path = f"{bucket_name}/fulfillment_costs.csv"
     try:
         if s3.exists(file_path):
-            with s3.open(file_path, 'rb') as f:
-                df = pd.read_csv(f)
-                return df
+            df = read_csv_from_s3(s3, file_path)
+            return df
         return pd.DataFrame(columns=['Auftragspauschale', 'SKU_Pick', 'Kartonage'])
     except Exception as e:
         logger.error(f"Fehler beim Laden der Fulfillment-Kostendaten: {str(e)}")
@@ -25,8 +25,9 @@ def save_fulfillment_costs(df):
     bucket_name = st.secrets['aws']['S3_BUCKET_NAME']
     file_path = f"{bucket_name}/fulfillment_costs.csv"
     try:
-        with s3.open(file_path, 'w') as f:
-            df.to_csv(f, index=False)
+        write_csv_to_s3(s3, file_path, df)
+        # Fulfillment-Kosten betreffen jede Bestellung
+        return invalidate_cost_caches()
     except Exception as e:
         logger.error(f"Fehler beim Speichern der Fulfillment-Kostendaten: {str(e)}")
         raise
@@ -0,0 +1,49 @@
+import pandas as pd
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from src.billbee_api import BillbeeAPI
+from src.data_processor import process_orders, create_dataframe, removed_order_ids
+from src.s3_operations import upsert_to_s3, save_daily_order_data
+from src.accounts import get_accounts
+
+logger = logging.getLogger(__name__)
+
+# Obergrenze paralleler Konten-Importe, damit die Threads S3 und Billbee nicht überlasten
+MAX_PARALLEL_ACCOUNTS = 4
+
+def ingest_orders_for_date(date, priority="batch", api=None, account=None):
+    """
+    Holt die Bestellungen eines Tages von Billbee und schreibt neue oder
+    geänderte Bestellungen nach S3; gelöschte und stornierte Bestellungen werden
+    aus der Partition entfernt. Ohne Streamlit-Ausgaben, damit die Funktion
+    auch in Hintergrundjobs läuft. Gibt (Anzahl Bestellungen, Anzahl geschrieben) zurück.
+    """
+    api = api or BillbeeAPI(account)
+    orders_data = api.get_orders_for_date(date, priority=priority)
+    save_daily_order_data(pd.DataFrame(orders_data), date, account=api.account)
+    df = create_dataframe(process_orders(orders_data))
+    changed_count = upsert_to_s3(df, date, account=api.account, removed_ids=removed_order_ids(orders_data))
+    logger.info(f"Import für {date} ({api.account}): {len(df)} Bestellungen, {changed_count} neu oder geändert")
+    return len(df), changed_count
+
+def ingest_all_accounts(date, priority="batch", accounts=None):
+    """
+    Importiert einen Tag für alle Konten parallel. Jedes Konto nutzt sein eigenes
+    Ratenlimit und schreibt in seine eigenen Partitionen, sodass sich die Konten
+    nicht gegenseitig ausbremsen. Gibt je Konto (Anzahl Bestellungen, Anzahl
+    geschrieben) oder die aufgetretene Exception zurück.
+    """
+    accounts = accounts or get_accounts()
+    results = {}
+    if not accounts:
+        logger.warning(f"Import für {date} übersprungen: kein Billbee-Konto konfiguriert")
+        return results
+    with ThreadPoolExecutor(max_workers=min(len(accounts), MAX_PARALLEL_ACCOUNTS), thread_name_prefix="ingest") as executor:
+        futures = {account: executor.submit(ingest_orders_for_date, date, priority, account=account) for account in accounts}
+        for account, future in futures.items():
+            try:
+                results[account] = future.result()
+            except Exception as e:
+                logger.error(f"Import für {date} ({account}) fehlgeschlagen: {str(e)}")
+                results[account] = e
+    return results
@@ -1,5 +1,7 @@
 import pandas as pd
-from src.s3_utils import get_s3_fs
+from src.s3_utils import get_s3_fs, read_csv_from_s3, write_csv_to_s3
+from src.cache import invalidate_cost_caches
+from src.cost_index import changed_keys, dates_for_skus, affected_cached_dates
 import logging
 import streamlit as st
 
@@ -11,10 +13,9 @@ def load_material_costs():
     file_path = f"{bucket_name}/material_costs.csv"
     try:
         if s3.exists(file_path):
-            with s3.open(file_path, 'rb') as f:
-                df = pd.read_csv(f)
-                df['SKU'] = df['SKU'].astype(str)
-                return df
+            df = read_csv_from_s3(s3, file_path)
+            df['SKU'] = df['SKU'].astype(str)
+            return df
         return pd.DataFrame(columns=['SKU', 'Cost'])
     except Exception as e:
         logger.error(f"Fehler beim Laden der Materialkostendaten: {str(e)}")
@@ -26,8 +27,11 @@ def save_material_costs(df):
     file_path = f"{bucket_name}/material_costs.csv"
     try:
         df['SKU'] = df['SKU'].astype(str)
-        with s3.open(file_path, 'w') as f:
-            df.to_csv(f, index=False)
+        previous = load_material_costs()
+        write_csv_to_s3(s3, file_path, df)
+        # Nur Tage verwerfen, an denen eine geänderte SKU bestellt wurde
+        changed_skus = changed_keys(previous, df, 'SKU', 'Cost')
+        return invalidate_cost_caches(dates=affected_cached_dates(dates_for_skus(changed_skus)))
     except Exception as e:
         logger.error(f"Fehler beim Speichern der Materialkostendaten: {str(e)}")
         raise
@@ -0,0 +1,235 @@
+import pandas as pd
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+import streamlit as st
+from src.billbee_api import BillbeeAPI
+from src.data_processor import process_orders, create_dataframe, deduplicate_orders, removed_order_ids
+from src.s3_operations import upsert_to_s3, save_daily_order_data
+from src.overview import (calculate_order_costs, summarize_day_costs, fold_day_costs, load_overview_costs,
+                          ORDER_COST_COLUMNS)
+from src.accounts import resolve_account
+
+logger = logging.getLogger(__name__)
+
+ORDER_KEY = "BillbeeID"
+DEFAULT_REFRESH_SECONDS = 180
+# Delta-Abrufe überlappen sich, damit Änderungen an der Abrufgrenze nicht verloren gehen
+POLL_OVERLAP = timedelta(seconds=60)
+
+def get_refresh_seconds():
+    """Aktualisierungsintervall der Live-Ansicht aus st.secrets["live"]["REFRESH_SECONDS"]."""
+    return int(st.secrets.get("live", {}).get("REFRESH_SECONDS", DEFAULT_REFRESH_SECONDS))
+
+def _replace_orders(existing, changed):
+    """Ersetzt Zeilen mit gleicher BillbeeID durch den neuen Stand."""
+    if existing.empty:
+        return changed.reset_index(drop=True)
+    if changed.empty:
+        return existing
+    kept = existing[~existing[ORDER_KEY].isin(changed[ORDER_KEY])]
+    return pd.concat([kept, changed], ignore_index=True)
+
+def _drop_orders(existing, order_ids):
+    if existing.empty or not order_ids:
+        return existing
+    return existing[~existing[ORDER_KEY].isin(order_ids)].reset_index(drop=True)
+
+class LiveDay:
+    """
+    Hält Bestellungen und Bestellkosten des laufenden Tages eines Kontos im
+    Speicher. Der erste Abruf lädt den Tag vollständig, danach werden nur die
+    seit dem letzten Abruf geänderten Bestellungen geholt und ihre Zeilen
+    (Schlüssel: BillbeeID) ersetzt; gelöschte und stornierte Bestellungen
+    werden wie beim Import entfernt (siehe process_orders()). Die Kennzahlen entstehen wie in der Übersicht aus den
+    Summen der Bestellkosten.
+
+    Abrufe laufen exklusiv, Leser sehen währenddessen den letzten Stand.
+    """
+
+    def __init__(self, day, account=None, api=None):
+        self.day = day
+        self.account = resolve_account(account)
+        self.api = api or BillbeeAPI(self.account)
+        self.raw_orders = {}
+        self.removed_ids = set()
+        self.orders = pd.DataFrame()
+        self.order_costs = pd.DataFrame(columns=ORDER_COST_COLUMNS)
+        # Zeitpunkt des letzten erfolgreichen Abrufs in UTC, so wird er auch an Billbee gesendet
+        self.last_poll = None
+        self.last_error = None
+        self.poll_count = 0
+        self._costs = None
+        self._poll_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+
+    def is_polling(self):
+        return self._poll_lock.locked()
+
+    def is_due(self, min_interval):
+        return self.last_poll is None or (datetime.now(timezone.utc) - self.last_poll).total_seconds() >= min_interval
+
+    def poll(self, costs, min_interval=0, blocking=True):
+        """
+        Übernimmt die Änderungen seit dem letzten Abruf. Liegt dieser weniger als
+        `min_interval` Sekunden zurück oder läuft bereits ein Abruf (bei
+        blocking=False), wird Billbee nicht gefragt. Gibt die Anzahl neuer,
+        geänderter oder entfernter Bestellungen des Tages zurück.
+        """
+        if not self._poll_lock.acquire(blocking=blocking):
+            return 0
+        try:
+            if costs is not self._costs:
+                # Kostentabellen haben sich geändert: bekannte Bestellungen neu bewerten
+                self._costs = costs
+                order_costs = self._calculate(self.orders)
+                with self._state_lock:
+                    self.order_costs = order_costs
+            if not self.is_due(min_interval):
+                return 0
+
+            started = datetime.now(timezone.utc)
+            try:
+                if self.last_poll is None:
+                    raw_orders = self.api.get_orders_for_date(self.day, priority="interactive")
+                else:
+                    raw_orders = self.api.get_orders_modified_since(self.last_poll - POLL_OVERLAP, priority="interactive")
+            except Exception as e:
+                self.last_error = str(e)
+                raise
+            # Änderungen an Bestellungen früherer Tage übernimmt der nächtliche Import
+            raw_orders = [order for order in raw_orders if order["CreatedAt"][:10] == self.day.isoformat()]
+            self._apply(raw_orders)
+            self.last_poll = started
+            self.last_error = None
+            self.poll_count += 1
+            return len(raw_orders)
+        finally:
+            self._poll_lock.release()
+
+    def poll_in_background(self, costs, min_interval):
+        """Startet einen Abruf in einem eigenen Thread, falls einer fällig ist und keiner läuft."""
+        if self.is_polling() or not self.is_due(min_interval):
+            return False
+
+        def run():
+            try:
+                self.poll(costs, min_interval=min_interval, blocking=False)
+            except Exception as e:
+                logger.error(f"Live-Abruf für {self.day} ({self.account}) fehlgeschlagen: {str(e)}")
+        threading.Thread(target=run, name=f"live-poll-{self.account}", daemon=True).start()
+        return True
+
+    def _apply(self, raw_orders):
+        if not raw_orders:
+            return
+        removed_ids = removed_order_ids(raw_orders)
+        active = [order for order in raw_orders if order["BillBeeOrderId"] not in removed_ids]
+        changed = deduplicate_orders(create_dataframe(process_orders(active))) if active else pd.DataFrame()
+        changed_costs = self._calculate(changed)
+
+        orders = _replace_orders(_drop_orders(self.orders, removed_ids), changed)
+        order_costs = _replace_orders(_drop_orders(self.order_costs, removed_ids), changed_costs)
+        with self._state_lock:
+            for order_id in removed_ids:
+                self.raw_orders.pop(order_id, None)
+            for order in active:
+                self.raw_orders[order["BillBeeOrderId"]] = order
+            self.removed_ids = (self.removed_ids | removed_ids) - {order["BillBeeOrderId"] for order in active}
+            self.orders = orders
+            self.order_costs = order_costs
+
+    def _calculate(self, orders):
+        if orders.empty:
+            return pd.DataFrame(columns=ORDER_COST_COLUMNS)
+        return calculate_order_costs(
+            orders, self._costs['material_costs'], self._costs['fulfillment_costs'],
+            self._costs['transaction_costs'], exchange_rates=self._costs['exchange_rates']
+        )
+
+    def close(self):
+        """
+        Schreibt den abgeschlossenen Tag über den Upsert-Pfad nach S3; im Laufe des
+        Tages stornierte Bestellungen werden dabei aus der Partition entfernt. Gibt
+        die Anzahl geschriebener oder entfernter Bestellungen zurück.
+        """
+        with self._state_lock:
+            orders = self.orders
+            raw_orders = list(self.raw_orders.values())
+            removed_ids = set(self.removed_ids)
+        if orders.empty and not removed_ids:
+            return 0
+        if raw_orders:
+            save_daily_order_data(pd.DataFrame(raw_orders), self.day, account=self.account)
+        return upsert_to_s3(orders, self.day, account=self.account, removed_ids=removed_ids)
+
+# Ein Live-Stand je (Konto, Tag) für alle Sitzungen, damit Billbee nicht pro Sitzung abgefragt wird
+_live_days = {}
+_live_days_lock = threading.Lock()
+_close_lock = threading.Lock()
+
+def get_live_day(account=None, costs=None, min_interval=None):
+    """
+    Liefert den aktuellen Live-Stand des heutigen Tages eines Kontos, ohne auf
+    Billbee zu warten. Ist ein Abruf fällig, läuft er im Hintergrund; das
+    Ergebnis erscheint bei der nächsten Aktualisierung. Billbee wird höchstens
+    einmal je Intervall gefragt, unabhängig von der Zahl offener Sitzungen.
+    """
+    account = resolve_account(account)
+    costs = costs or load_overview_costs()
+    min_interval = get_refresh_seconds() if min_interval is None else min_interval
+    key = (account, datetime.now().date())
+    with _live_days_lock:
+        live = _live_days.get(key)
+        if live is None:
+            live = _live_days[key] = LiveDay(key[1], account)
+        past_days = any(day < key[1] for _, day in _live_days)
+    if past_days:
+        # Auch ohne nächtlichen Scheduler werden vergangene Tage gespeichert und freigegeben
+        _close_in_background(costs)
+    live.poll_in_background(costs, min_interval)
+    return live
+
+def _close_in_background(costs):
+    if _close_lock.locked():
+        return
+
+    def run():
+        for (account, day), result in close_live_days(costs).items():
+            if isinstance(result, Exception):
+                logger.error(f"Live-Stand {day} ({account}) konnte nicht gespeichert werden: {str(result)}")
+    threading.Thread(target=run, name="live-close", daemon=True).start()
+
+def close_live_days(costs=None):
+    """
+    Ruft die Live-Stände vergangener Tage ein letztes Mal ab, speichert sie und
+    gibt sie frei. Läuft im nächtlichen Hintergrundjob und beim ersten Aufruf
+    von get_live_day() nach dem Tageswechsel. Gibt je (Konto, Tag) die Anzahl
+    geschriebener Bestellungen oder die aufgetretene Exception zurück; nicht
+    gespeicherte Tage bleiben für den nächsten Versuch erhalten.
+    """
+    with _close_lock:
+        today = datetime.now().date()
+        with _live_days_lock:
+            closed = {key: live for key, live in _live_days.items() if key[1] < today}
+        if not closed:
+            return {}
+        costs = costs or load_overview_costs()
+        results = {}
+        for key, live in closed.items():
+            try:
+                live.poll(costs)
+                results[key] = live.close()
+            except Exception as e:
+                results[key] = e
+                continue
+            with _live_days_lock:
+                _live_days.pop(key, None)
+            logger.info(f"Live-Stand {live.day} ({live.account}) gespeichert: {results[key]} neu, geändert oder entfernt")
+        return results
+
+def compute_live_overview(live_days, marketplace, costs):
+    """Tageskennzahlen über die Live-Stände mehrerer Konten, wie in compute_overview_streaming()."""
+    day_costs = [summarize_day_costs(live.order_costs, costs['exchange_rates']) for live in live_days if not live.order_costs.empty]
+    overview_data, _ = fold_day_costs(day_costs, marketplace, costs)
+    return overview_data
@@ -0,0 +1,66 @@
+import pandas as pd
+import logging
+from pandas.api.types import union_categoricals, is_integer_dtype, is_object_dtype, is_string_dtype
+from src.s3_utils import read_csv_from_s3
+
+logger = logging.getLogger(__name__)
+
+# Wiederkehrende Texte werden als Kategorien gespeichert
+CATEGORY_COLUMNS = ['Platform', 'CustomerCountry', 'Currency']
+DATE_COLUMNS = ['CreatedAt', 'Date']
+# Fließkommaspalten (Geldbeträge, TotalOrderWeight) fließen in die Kostenberechnung
+# ein und bleiben float64, damit Summen über lange Zeiträume centgenau bleiben
+ORDER_READ_DTYPES = {col: 'category' for col in CATEGORY_COLUMNS}
+
+def optimize_order_dtypes(df):
+    """
+    Wandelt einen Bestell-DataFrame in speichersparende Datentypen um:
+    Kategorien für Plattform/Land/Währung, native Datumswerte und
+    verkleinerte Ganzzahlen. Fließkommaspalten bleiben float64.
+    """
+    if df is None or df.empty:
+        return df
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    for col in DATE_COLUMNS:
+        if col in df.columns and (is_object_dtype(df[col]) or is_string_dtype(df[col])):
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            continue
+        if is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+def read_orders_csv(s3, path):
+    """Liest eine Bestelldatei aus S3 direkt mit dem speichersparenden Schema."""
+    return optimize_order_dtypes(read_csv_from_s3(s3, path, dtype=ORDER_READ_DTYPES))
+
+def concat_order_frames(frames):
+    """
+    Verkettet Bestell-DataFrames, ohne dass Kategorie-Spalten mit
+    unterschiedlichen Kategorien zu object-Spalten werden.
+    """
+    frames = [frame for frame in frames if frame is not None and not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    for col in CATEGORY_COLUMNS:
+        columns = [frame[col] for frame in frames if col in frame.columns and isinstance(frame[col].dtype, pd.CategoricalDtype)]
+        if len(columns) != len(frames):
+            continue
+        categories = union_categoricals(columns, ignore_order=True).categories
+        frames = [frame.assign(**{col: frame[col].cat.set_categories(categories)}) for frame in frames]
+    return pd.concat(frames, ignore_index=True)
+
+def memory_report(df):
+    """Liefert den Speicherbedarf pro Spalte (inklusive Inhalt von Strings) in Bytes."""
+    usage = df.memory_usage(deep=True, index=True)
+    report = pd.DataFrame({
+        'Spalte': usage.index,
+        'Typ': [str(df[col].dtype) if col in df.columns else '' for col in usage.index],
+        'Bytes': usage.values,
+    })
+    report = pd.concat([report, pd.DataFrame([{'Spalte': 'Gesamt', 'Typ': '', 'Bytes': int(usage.sum())}])], ignore_index=True)
+    logger.debug(f"Speicherbedarf des DataFrames: {usage.sum() / 1024 / 1024:.1f} MB bei {len(df)} Zeilen")
+    return report
@@ -0,0 +1,298 @@
+import pandas as pd
+import logging
+import json
+from src.data_processor import deduplicate_orders
+from src.exchange_rates import convert_to_eur, load_exchange_rates, missing_rate_mask
+from src.fulfillment_costs import calculate_shipping_costs, load_fulfillment_costs
+from src.inventory_management import load_material_costs
+from src.marketing_costs import load_marketing_costs
+from src.s3_operations import load_from_s3
+from src.transaction_costs import load_transaction_costs
+from src.cache import cost_cache, order_cost_cache
+from src.accounts import get_accounts, resolve_account
+
+logger = logging.getLogger(__name__)
+
+MARKETING_COLUMNS = {
+    'Shopify': ['Google Ads'],
+    'Amazon': ['Amazon Ads'],
+    'Ebay': ['Ebay Ads'],
+    'Kaufland.de': ['Kaufland Ads'],
+}
+ALL_MARKETING_COLUMNS = ['Google Ads', 'Amazon Ads', 'Ebay Ads', 'Kaufland Ads']
+
+SUM_COLUMNS = ['TotalOrderPrice', 'TaxAmount', 'MaterialCost', 'FulfillmentCost', 'ShippingCost', 'TransactionCost']
+ORDER_COST_COLUMNS = ['BillbeeID', 'CreatedAt', 'Platform', 'CustomerCountry', 'Currency'] + SUM_COLUMNS
+# Schlüssel der gecachten Kostensummen je Tag; Plattform für den Marktplatzfilter,
+# Währung für die Hinweise auf fehlende Wechselkurse
+DAY_COST_KEYS = ['CreatedAt', 'Platform', 'Currency']
+
+def load_overview_costs():
+    """Lädt alle Kostentabellen, die für die Übersicht benötigt werden (zwischengespeichert)."""
+    def load():
+        material_costs = load_material_costs()
+        return {
+            'material_costs': material_costs.set_index('SKU')['Cost'].to_dict(),
+            'material_costs_df': material_costs,
+            'fulfillment_costs': load_fulfillment_costs(),
+            'transaction_costs': load_transaction_costs(),
+            'marketing_costs': load_marketing_costs(),
+            'exchange_rates': load_exchange_rates(),
+        }
+    return cost_cache.get_or_compute('overview_costs', load)
+
+def costs_missing(costs):
+    return costs['material_costs_df'].empty or costs['fulfillment_costs'].empty or costs['transaction_costs'].empty
+
+def marketplace_options(platforms):
+    """Auswahlliste der Marktplätze, 'eBay' wird einheitlich als 'Ebay' geführt."""
+    options = ["Alle"]
+    for platform in platforms:
+        platform = 'Ebay' if platform == 'eBay' else platform
+        if platform not in options:
+            options.append(platform)
+    return options
+
+def filter_marketplace(df, marketplace):
+    """Filtert Bestellungen nach Marktplatz, beide Schreibweisen von eBay werden berücksichtigt."""
+    if not marketplace or marketplace == "Alle":
+        return df
+    if marketplace == 'Ebay':
+        return df[df['Platform'].isin(['Ebay', 'eBay'])]
+    return df[df['Platform'] == marketplace]
+
+def calculate_order_costs(billbee_data, material_costs, fulfillment_costs, transaction_costs, selected_marketplace=None, selected_country=None, exchange_rates=None):
+    """
+    Berechnet Material-, Fulfillment-, Versand- und Transaktionskosten je Bestellung.
+    Alle Beträge sind in EUR, sofern Wechselkurse übergeben werden.
+    """
+    # Erstelle eine explizite Kopie des DataFrames ohne doppelte Bestellungen
+    df = deduplicate_orders(billbee_data).copy()
+    
+    # Filter nach Marktplatz und Land
+    if selected_marketplace:
+        df = df[df['Platform'] == selected_marketplace]
+    if selected_country:
+        df = df[df['CustomerCountry'] == selected_country]
+    if df.empty:
+        return pd.DataFrame(columns=ORDER_COST_COLUMNS)
+    
+    # Rechne alle Umsatz- und Kostenbeträge vor der Aggregation in EUR um
+    if exchange_rates is not None:
+        df = convert_to_eur(df, exchange_rates)
+    
+    df['CreatedAt'] = pd.to_datetime(df['CreatedAt']).dt.date
+    df['OrderItems'] = df['OrderItems'].apply(json.loads)
+    
+    # Berechne Materialkosten
+    def calculate_material_cost(order_items):
+        return sum(material_costs.get(item['SKU'], 0) * item['Quantity'] for item in order_items)
+    
+    df['MaterialCost'] = df['OrderItems'].apply(calculate_material_cost)
+    
+    # Berechne Fulfillment-Kosten
+    df['FulfillmentCost'] = (
+        fulfillment_costs['Auftragspauschale'].iloc[0] +
+        fulfillment_costs['SKU_Pick'].iloc[0] * df['OrderItems'].apply(lambda x: sum(item['Quantity'] for item in x)) +
+        fulfillment_costs['Kartonage'].iloc[0]
+    )
+    
+    # Berechne Versandkosten
+    df['ShippingCost'] = df.apply(lambda row: calculate_shipping_costs(row['TotalOrderWeight'], row['CustomerCountry']), axis=1)
+    
+    # Berechne Transaktionskosten
+    transaction_cost_dict = dict(zip(transaction_costs['Platform'], transaction_costs['TransactionCostPercent']))
+    df['TransactionCost'] = df.apply(lambda row: row['TotalOrderPrice'] * transaction_cost_dict.get(row['Platform'], 0) / 100, axis=1)
+    
+    return df[[col for col in ORDER_COST_COLUMNS if col in df.columns]].reset_index(drop=True)
+
+def sum_order_costs(order_costs):
+    """Summiert Bestellkosten je Tag. Teilsummen lassen sich erneut summieren."""
+    return order_costs.groupby('CreatedAt')[SUM_COLUMNS].sum().reset_index()
+
+def finalize_overview(grouped):
+    """Berechnet aus den Tagessummen die Kennzahlen der Übersicht."""
+    grouped = grouped.copy()
+    
+    # Berechne die zusätzlichen Metriken
+    grouped['UmsatzNetto'] = grouped['TotalOrderPrice'] - grouped['TaxAmount']
+    grouped['MaterialkostenProzent'] = (grouped['MaterialCost'] / grouped['UmsatzNetto']) * 100
+    grouped['Deckungsbeitrag1'] = grouped['UmsatzNetto'] - grouped['MaterialCost']
+    grouped['GesamtkostenFulfillment'] = grouped['FulfillmentCost'] + grouped['ShippingCost']
+    grouped['GesamtkostenFulfillmentProzent'] = (grouped['GesamtkostenFulfillment'] / grouped['UmsatzNetto']) * 100
+    grouped['TransaktionskostenProzent'] = (grouped['TransactionCost'] / grouped['UmsatzNetto']) * 100
+    grouped['Deckungsbeitrag2'] = grouped['Deckungsbeitrag1'] - grouped['GesamtkostenFulfillment'] - grouped['TransactionCost']
+    
+    # Formatiere die Tabelle
+    result = grouped.rename(columns={
+        'CreatedAt': 'Datum',
+        'TotalOrderPrice': 'Umsatz Brutto',
+        'UmsatzNetto': 'Umsatz Netto',
+        'MaterialCost': 'Materialkosten',
+        'MaterialkostenProzent': 'Materialkosten %',
+        'Deckungsbeitrag1': 'Deckungsbeitrag 1',
+        'FulfillmentCost': 'Fulfillment-Kosten',
+        'ShippingCost': 'Versandkosten',
+        'GesamtkostenFulfillment': 'Gesamtkosten Fulfillment €',
+        'GesamtkostenFulfillmentProzent': 'Gesamtkosten Fulfillment %',
+        'TransactionCost': 'Transaktionskosten',
+        'TransaktionskostenProzent': 'Transaktionskosten %',
+        'Deckungsbeitrag2': 'Deckungsbeitrag 2'
+    })
+    
+    # Runde die Zahlen
+    for col in ['Umsatz Brutto', 'Umsatz Netto', 'Materialkosten', 'Deckungsbeitrag 1', 
+                'Fulfillment-Kosten', 'Versandkosten', 'Gesamtkosten Fulfillment €', 
+                'Transaktionskosten', 'Deckungsbeitrag 2']:
+        result[col] = result[col].round(2)
+    for col in ['Materialkosten %', 'Gesamtkosten Fulfillment %', 'Transaktionskosten %']:
+        result[col] = result[col].round(1)
+    
+    return result
+
+def calculate_overview_data(billbee_data, material_costs, fulfillment_costs, transaction_costs, selected_marketplace=None, selected_country=None, exchange_rates=None):
+    try:
+        order_costs = calculate_order_costs(
+            billbee_data, material_costs, fulfillment_costs, transaction_costs,
+            selected_marketplace, selected_country, exchange_rates
+        )
+        return finalize_overview(sum_order_costs(order_costs))
+    except Exception as e:
+        logger.error(f"Fehler bei der Berechnung der Übersichtsdaten: {str(e)}", exc_info=True)
+        raise
+
+def add_marketing_costs(overview_data, marketing_costs, marketplace):
+    """Ergänzt die Marketingkosten des Marktplatzes und berechnet Deckungsbeitrag 3."""
+    overview_data = pd.merge(overview_data, marketing_costs, left_on='Datum', right_on='Date', how='left')
+    
+    # Wähle die entsprechende Marketingkostenspalte basierend auf dem ausgewählten Marktplatz
+    columns = MARKETING_COLUMNS.get(marketplace, ALL_MARKETING_COLUMNS)
+    overview_data['Marketingkosten'] = overview_data[columns].sum(axis=1, min_count=len(columns))
+    
+    overview_data['Marketingkosten'] = overview_data['Marketingkosten'].fillna(0)
+    overview_data['Deckungsbeitrag 3'] = overview_data['Deckungsbeitrag 2'] - overview_data['Marketingkosten']
+    
+    # Runde die neuen Spalten
+    overview_data['Marketingkosten'] = overview_data['Marketingkosten'].round(2)
+    overview_data['Deckungsbeitrag 3'] = overview_data['Deckungsbeitrag 3'].round(2)
+    return overview_data
+
+def compute_overview(orders, marketplace, costs):
+    """
+    Berechnet die Tagesübersicht aus bereits geladenen Bestellungen. Die
+    Bestellkosten werden wie im Streaming-Pfad erst je Tag, Plattform und Währung
+    verdichtet und dann mit fold_day_costs() zusammengefasst, damit beide Pfade
+    dieselben Summen in derselben Reihenfolge bilden und auf den Cent
+    übereinstimmen. Gibt (overview_data, stats) zurück.
+    """
+    filtered = filter_marketplace(orders, marketplace)
+    if filtered.empty:
+        stats = {'loaded_orders': len(orders), 'foreign_orders': 0, 'missing_rates': {}}
+        return pd.DataFrame(), stats
+    order_costs = calculate_order_costs(
+        filtered, costs['material_costs'], costs['fulfillment_costs'],
+        costs['transaction_costs'], exchange_rates=costs['exchange_rates']
+    )
+    overview_data, stats = fold_day_costs([summarize_day_costs(order_costs, costs['exchange_rates'])], marketplace, costs)
+    stats['loaded_orders'] = len(orders)
+    return overview_data, stats
+
+def summarize_day_costs(order_costs, rates):
+    """
+    Verdichtet die Bestellkosten eines Tages je Plattform und Währung. Neben den
+    Kostensummen werden die Anzahl Bestellungen und die Anzahl Bestellungen ohne
+    Wechselkurs mitgeführt.
+    """
+    df = order_costs[DAY_COST_KEYS + SUM_COLUMNS].copy()
+    df['Platform'] = df['Platform'].astype(object)
+    df['Currency'] = df['Currency'].astype(object)
+    df['Orders'] = 1
+    df['MissingRate'] = missing_rate_mask(order_costs, rates).astype(int)
+    return df.groupby(DAY_COST_KEYS, dropna=False)[SUM_COLUMNS + ['Orders', 'MissingRate']].sum().reset_index()
+
+def _load_uncached(date, account=None):
+    # Die Rohdaten werden nach der Verdichtung verworfen und daher nicht gecacht
+    return load_from_s3(date, use_cache=False, account=account)
+
+def get_order_costs_for_date(date, costs, loader=_load_uncached, account=None):
+    """
+    Liefert die Kostensummen aller Marktplätze für einen Tag und ein Konto aus
+    dem Cache oder berechnet sie aus der Partition. Gibt None zurück, wenn keine
+    Daten vorliegen.
+    """
+    account = resolve_account(account)
+
+    def compute():
+        df = loader(date, account=account)
+        if df is None or df.empty:
+            return None
+        order_costs = calculate_order_costs(
+            df, costs['material_costs'], costs['fulfillment_costs'],
+            costs['transaction_costs'], exchange_rates=costs['exchange_rates']
+        )
+        return summarize_day_costs(order_costs, costs['exchange_rates'])
+    return order_cost_cache.get_or_compute((account, date), compute)
+
+def refresh_order_costs(keys, loader=_load_uncached):
+    """Berechnet die Kostensummen der angegebenen (Konto, Tag)-Schlüssel mit den aktuellen Kostentabellen neu."""
+    costs = load_overview_costs()
+    for account, date in sorted(keys):
+        get_order_costs_for_date(date, costs, loader, account=account)
+    return len(keys)
+
+def collect_day_costs(dates, costs, accounts=None, loader=_load_uncached, on_progress=None):
+    """
+    Liefert die Kostensummen aller Tage und Konten. Fehlende Tage werden einzeln
+    geladen und verdichtet, sodass höchstens eine Tagespartition gleichzeitig im
+    Speicher liegt. Als fehlend gilt ein Tag, wenn für keines der Konten Daten
+    vorliegen. Gibt (day_costs, missing_dates) zurück.
+    """
+    accounts = accounts or get_accounts()
+    day_costs = []
+    missing_dates = []
+    for done, date in enumerate(dates, start=1):
+        day_frames = [get_order_costs_for_date(date, costs, loader, account=account) for account in accounts]
+        day_frames = [frame for frame in day_frames if frame is not None and not frame.empty]
+        if day_frames:
+            day_costs.extend(day_frames)
+        else:
+            missing_dates.append(date)
+        if on_progress:
+            on_progress(done)
+    return day_costs, missing_dates
+
+def day_cost_platforms(day_costs):
+    """Alle Plattformen, die in den Kostensummen vorkommen."""
+    return sorted({str(platform) for frame in day_costs for platform in frame['Platform'].dropna()})
+
+def fold_day_costs(day_costs, marketplace, costs):
+    """
+    Berechnet die Tagesübersicht aus den Kostensummen. Die Kennzahlen entstehen
+    erst aus den Gesamtsummen; compute_overview(), die Live-Ansicht und der
+    Streaming-Pfad laufen alle über diese Funktion. Gibt (overview_data, stats)
+    zurück.
+    """
+    stats = {'loaded_orders': 0, 'foreign_orders': 0, 'missing_rates': {}}
+    if not day_costs:
+        return pd.DataFrame(), stats
+    combined = pd.concat(day_costs, ignore_index=True)
+    stats['loaded_orders'] = int(combined['Orders'].sum())
+    filtered = filter_marketplace(combined, marketplace)
+    if filtered.empty:
+        return pd.DataFrame(), stats
+    stats['foreign_orders'] = int(filtered.loc[filtered['Currency'].astype(str) != 'EUR', 'Orders'].sum())
+    missing = filtered[filtered['MissingRate'] > 0]
+    stats['missing_rates'] = {str(currency).upper(): int(count) for currency, count in missing.groupby(missing['Currency'].astype(str))['MissingRate'].sum().items()}
+    overview_data = finalize_overview(filtered.groupby('CreatedAt')[SUM_COLUMNS].sum().reset_index())
+    return add_marketing_costs(overview_data, costs['marketing_costs'], marketplace), stats
+
+def compute_overview_streaming(dates, marketplace, costs, loader=_load_uncached, on_progress=None, accounts=None):
+    """
+    Berechnet die Tagesübersicht tageweise über die gecachten Kostensummen je
+    Konto und Tag; die Einzelbestellungen werden nach der Verdichtung verworfen.
+    Ohne `accounts` werden die Bestellungen aller Konten zusammengefasst.
+    Gibt (overview_data, missing_dates, stats) zurück.
+    """
+    day_costs, missing_dates = collect_day_costs(dates, costs, accounts, loader, on_progress)
+    overview_data, stats = fold_day_costs(day_costs, marketplace, costs)
+    return overview_data, missing_dates, stats
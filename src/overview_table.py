@@ -0,0 +1,92 @@
+import pandas as pd
+import numpy as np
+import streamlit as st
+import logging
+
+logger = logging.getLogger(__name__)
+
+EURO_COLUMNS = [
+    'Umsatz Brutto', 'Umsatz Netto', 'Materialkosten', 'Deckungsbeitrag 1',
+    'Fulfillment-Kosten', 'Versandkosten', 'Transaktionskosten',
+    'Deckungsbeitrag 2', 'Marketingkosten', 'Deckungsbeitrag 3'
+]
+# Prozentspalte -> Betragsspalte, jeweils bezogen auf den Nettoumsatz
+PERCENT_COLUMNS = {
+    'Materialkosten %': 'Materialkosten',
+    'Gesamtkosten Fulfillment %': 'Gesamtkosten Fulfillment €',
+    'Transaktionskosten %': 'Transaktionskosten',
+    'Marketingkosten %': 'Marketingkosten',
+    'Deckungsbeitrag 3 %': 'Deckungsbeitrag 3',
+}
+TABLE_COLUMNS = EURO_COLUMNS + ['Deckungsbeitrag 3 %']
+
+GRANULARITIES = ["Automatisch", "Tag", "Woche", "Monat"]
+PERIOD_CODES = {"Woche": "W", "Monat": "M"}
+DATE_FORMATS = {"Tag": "DD.MM.YYYY", "Woche": "DD.MM.YYYY", "Monat": "MM.YYYY"}
+DATE_LABELS = {"Tag": "Datum", "Woche": "Woche ab", "Monat": "Monat"}
+PAGE_SIZE = 31
+
+def choose_granularity(day_count):
+    """Wählt die Zeiteinheit so, dass auch lange Zeiträume nur wenige Zeilen ergeben."""
+    if day_count <= 62:
+        return "Tag"
+    if day_count <= 366:
+        return "Woche"
+    return "Monat"
+
+def bucket_overview_data(overview_data, granularity="Tag"):
+    """
+    Fasst die Tageswerte nach Tag, Woche oder Monat zusammen. Beträge werden
+    summiert, Prozentwerte aus den Summen neu berechnet. Alle Spalten bleiben numerisch.
+    """
+    df = overview_data.copy()
+    df['Datum'] = pd.to_datetime(df['Datum'])
+    sum_columns = [col for col in EURO_COLUMNS + ['Gesamtkosten Fulfillment €'] if col in df.columns]
+
+    if granularity in PERIOD_CODES:
+        period_start = df['Datum'].dt.to_period(PERIOD_CODES[granularity]).dt.start_time
+        bucketed = df.groupby(period_start)[sum_columns].sum().reset_index()
+    else:
+        bucketed = df[['Datum'] + sum_columns].sort_values('Datum').reset_index(drop=True)
+
+    net_revenue = bucketed['Umsatz Netto'].replace(0, np.nan)
+    for percent_column, amount_column in PERCENT_COLUMNS.items():
+        if amount_column in bucketed.columns:
+            bucketed[percent_column] = (bucketed[amount_column] / net_revenue * 100).round(1)
+    bucketed[sum_columns] = bucketed[sum_columns].round(2)
+    return bucketed
+
+def overview_column_config(granularity):
+    """Formatiert die numerischen Spalten im Browser statt als vorformatierte Strings."""
+    config = {
+        'Datum': st.column_config.DateColumn(DATE_LABELS[granularity], format=DATE_FORMATS[granularity]),
+    }
+    for col in EURO_COLUMNS:
+        config[col] = st.column_config.NumberColumn(col, format="%.2f €")
+    for col in PERCENT_COLUMNS:
+        config[col] = st.column_config.NumberColumn(col, format="%.1f %%")
+    return config
+
+def display_overview_table(overview_data, granularity="Automatisch", key="overview_table"):
+    """
+    Zeigt die Übersicht als sortierbare, numerische Tabelle mit einer Zeile pro
+    Zeiteinheit. Lange Zeiträume werden gebündelt und seitenweise ausgeliefert.
+    """
+    if granularity == "Automatisch":
+        granularity = choose_granularity(overview_data['Datum'].nunique())
+
+    table = bucket_overview_data(overview_data, granularity)
+    table = table[['Datum'] + [col for col in TABLE_COLUMNS if col in table.columns]]
+
+    page_count = max(1, int(np.ceil(len(table) / PAGE_SIZE)))
+    if page_count > 1:
+        page = st.number_input(f"Seite (1–{page_count})", min_value=1, max_value=page_count, value=1, step=1, key=f"{key}_page")
+        table = table.iloc[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+
+    st.dataframe(
+        table,
+        column_config=overview_column_config(granularity),
+        hide_index=True,
+        use_container_width=True
+    )
+    return granularity
@@ -0,0 +1,106 @@
+import cProfile
+import os
+import uuid
+import pstats
+import marshal
+import json
+import threading
+import time
+import logging
+from datetime import datetime
+import pandas as pd
+import streamlit as st
+from src.s3_utils import get_s3_fs, write_bytes_to_s3
+
+logger = logging.getLogger(__name__)
+
+PROFILE_PREFIX = "profiles"
+PROFILE_QUERY_PARAM = "profile"
+PROFILE_TOGGLE_KEY = "profiling_enabled"
+TOP_N_HOTSPOTS = 25
+
+# Tags des aktuell profilierten Laufs (pro Skript-Thread), None = Profiling aus
+_active = threading.local()
+
+def profiling_requested():
+    """Profiling per Query-Parameter (?profile=1) oder Schalter in der Sidebar."""
+    if st.query_params.get(PROFILE_QUERY_PARAM, "").lower() in ("1", "true", "ja"):
+        return True
+    return bool(st.session_state.get(PROFILE_TOGGLE_KEY, False))
+
+def record_profile_tags(**tags):
+    """Hängt Metadaten (Zeitraum, Filter, Zeilenzahlen) an das Profil des laufenden Skriptlaufs."""
+    active_tags = getattr(_active, 'tags', None)
+    if active_tags is not None:
+        active_tags.update({key: str(value) for key, value in tags.items()})
+
+def profile_file_name():
+    """Eindeutiger Name je Lauf, auch bei mehreren Läufen in derselben Sekunde."""
+    return f"profile_{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}_{uuid.uuid4().hex[:8]}.prof"
+
+def run_profiled(fn):
+    """
+    Führt einen Skriptlauf unter cProfile aus, speichert das Profil und zeigt die
+    Hotspots an. Das Profil wird auch gespeichert, wenn der Lauf mit einer
+    Exception endet.
+    """
+    profiler = cProfile.Profile()
+    _active.tags = {}
+    started = time.perf_counter()
+    completed = False
+    profiler.enable()
+    try:
+        fn()
+        completed = True
+    except BaseException as e:
+        _active.tags['error'] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        profiler.disable()
+        duration = time.perf_counter() - started
+        tags = _active.tags
+        _active.tags = None
+        stats = pstats.Stats(profiler)
+        profile_bytes = marshal.dumps(stats.stats)
+        file_name = profile_file_name()
+        tags['duration_seconds'] = f"{duration:.3f}"
+        save_profile(file_name, profile_bytes, tags)
+        if completed:
+            display_profile_results(stats, profile_bytes, file_name, tags)
+
+def save_profile(file_name, profile_bytes, tags):
+    """Legt das Profil (pstats-Format, z.B. für snakeviz) und seine Metadaten in S3 ab."""
+    try:
+        s3 = get_s3_fs()
+        bucket_name = st.secrets['aws']['S3_BUCKET_NAME']
+        full_path = f"{bucket_name}/{PROFILE_PREFIX}/{file_name}"
+        with s3.open(full_path, 'wb') as f:
+            f.write(profile_bytes)
+        write_bytes_to_s3(s3, full_path.replace('.prof', '.json'), json.dumps(tags, indent=2).encode('utf-8'))
+        logger.info(f"Profil gespeichert: {full_path}")
+        return full_path
+    except Exception as e:
+        logger.error(f"Fehler beim Speichern des Profils: {str(e)}")
+        return None
+
+def hotspot_table(stats, limit=TOP_N_HOTSPOTS):
+    """Die `limit` Funktionen mit der höchsten kumulierten Laufzeit."""
+    rows = []
+    for (file_name, line, function), (primitive_calls, calls, total_time, cumulative_time, _) in stats.stats.items():
+        rows.append({
+            'Funktion': function,
+            'Ort': f"{file_name}:{line}",
+            'Aufrufe': calls,
+            'Eigene Zeit (s)': round(total_time, 4),
+            'Kumuliert (s)': round(cumulative_time, 4),
+        })
+    table = pd.DataFrame(rows)
+    if table.empty:
+        return table
+    return table.sort_values('Kumuliert (s)', ascending=False).head(limit).reset_index(drop=True)
+
+def display_profile_results(stats, profile_bytes, file_name, tags):
+    with st.expander(f"Profil dieses Laufs ({tags['duration_seconds']} s)", expanded=True):
+        st.json(tags, expanded=False)
+        st.dataframe(hotspot_table(stats), hide_index=True, use_container_width=True)
+        st.download_button("Profil herunterladen (.prof)", data=profile_bytes, file_name=file_name, mime="application/octet-stream")
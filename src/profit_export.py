@@ -0,0 +1,167 @@
+import pandas as pd
+import logging
+import os
+import tempfile
+import uuid
+from datetime import datetime
+import streamlit as st
+from src.s3_utils import get_s3_fs
+from src.s3_operations import load_from_s3
+from src.overview import calculate_order_costs, filter_marketplace
+from src.accounts import get_accounts, resolve_account
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_PREFIX = "exports"
+EXPORT_CHUNK_DAYS = 7
+EXPORT_FORMATS = ["CSV", "Parquet"] if pa is not None else ["CSV"]
+# Größere Exporte werden nicht über den Browser-Download, sondern über S3 ausgeliefert
+DIRECT_DOWNLOAD_MAX_BYTES = 50 * 1024 * 1024
+
+EXPORT_COLUMNS = {
+    'Account': 'Shop',
+    'BillbeeID': 'BillbeeID',
+    'CreatedAt': 'Datum',
+    'Platform': 'Plattform',
+    'CustomerCountry': 'Land',
+    'Currency': 'Währung',
+    'TotalOrderPrice': 'Umsatz Brutto',
+    'UmsatzNetto': 'Umsatz Netto',
+    'MaterialCost': 'Materialkosten',
+    'FulfillmentCost': 'Fulfillment-Kosten',
+    'ShippingCost': 'Versandkosten',
+    'TransactionCost': 'Transaktionskosten',
+    'Deckungsbeitrag1': 'Deckungsbeitrag 1',
+    'Deckungsbeitrag2': 'Deckungsbeitrag 2',
+}
+MONEY_EXPORT_COLUMNS = ['Umsatz Brutto', 'Umsatz Netto', 'Materialkosten', 'Fulfillment-Kosten',
+                        'Versandkosten', 'Transaktionskosten', 'Deckungsbeitrag 1', 'Deckungsbeitrag 2']
+
+def calculate_order_profit(order_costs, account=None):
+    """Berechnet DB1 und DB2 je Bestellung aus den Bestellkosten eines Kontos."""
+    df = order_costs.copy()
+    df['Account'] = resolve_account(account)
+    df['UmsatzNetto'] = df['TotalOrderPrice'] - df['TaxAmount']
+    df['Deckungsbeitrag1'] = df['UmsatzNetto'] - df['MaterialCost']
+    df['Deckungsbeitrag2'] = df['Deckungsbeitrag1'] - df['FulfillmentCost'] - df['ShippingCost'] - df['TransactionCost']
+    result = df[list(EXPORT_COLUMNS)].rename(columns=EXPORT_COLUMNS)
+    # Feste Datentypen je Spalte: ParquetWriter übernimmt das Schema des ersten
+    # Blocks, die Ganzzahlen der Partitionen werden aber je Tag verkleinert
+    result['BillbeeID'] = result['BillbeeID'].astype('int64')
+    for col in ['Shop', 'Plattform', 'Land', 'Währung']:
+        result[col] = result[col].astype(str)
+    result[MONEY_EXPORT_COLUMNS] = result[MONEY_EXPORT_COLUMNS].astype('float64').round(2)
+    return result
+
+def iter_order_profit_chunks(dates, costs, marketplace=None, chunk_days=EXPORT_CHUNK_DAYS, loader=None, on_progress=None, accounts=None):
+    """
+    Liefert die Bestellgewinne blockweise (höchstens `chunk_days` Tage je Block
+    und Konto). Die Partitionen werden am Cache vorbei geladen, damit große
+    Exporte weder den Speicher noch die Caches der Übersicht belegen.
+    """
+    loader = loader or (lambda date, account=None: load_from_s3(date, use_cache=False, account=account))
+    accounts = accounts or get_accounts()
+    for offset in range(0, len(dates), chunk_days):
+        for account in accounts:
+            frames = []
+            for date in dates[offset:offset + chunk_days]:
+                df = loader(date, account=account)
+                if df is not None and not df.empty:
+                    frames.append(filter_marketplace(df, marketplace))
+            frames = [frame for frame in frames if not frame.empty]
+            if frames:
+                order_costs = calculate_order_costs(
+                    pd.concat(frames, ignore_index=True), costs['material_costs'],
+                    costs['fulfillment_costs'], costs['transaction_costs'],
+                    exchange_rates=costs['exchange_rates']
+                )
+                del frames
+                yield calculate_order_profit(order_costs, account)
+        if on_progress:
+            on_progress(min(offset + chunk_days, len(dates)))
+
+def write_order_profit(chunks, f, file_format="CSV"):
+    """Schreibt die Blöcke nacheinander in ein binäres Dateiobjekt. Gibt die Zeilenzahl zurück."""
+    row_count = 0
+    if file_format == "Parquet":
+        if pa is None:
+            raise RuntimeError("Für den Parquet-Export wird 'pyarrow' benötigt.")
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False, schema=writer.schema if writer else None)
+                if writer is None:
+                    writer = pq.ParquetWriter(f, table.schema)
+                writer.write_table(table)
+                row_count += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        return row_count
+
+    header = True
+    for chunk in chunks:
+        f.write(chunk.to_csv(index=False, header=header).encode('utf-8'))
+        header = False
+        row_count += len(chunk)
+    if header:
+        f.write((",".join(EXPORT_COLUMNS.values()) + "\n").encode('utf-8'))
+    return row_count
+
+def export_file_name(start_date, end_date, file_format):
+    extension = "parquet" if file_format == "Parquet" else "csv"
+    return f"bestellgewinne_{start_date:%Y-%m-%d}_{end_date:%Y-%m-%d}_{datetime.now():%Y%m%d%H%M%S}_{uuid.uuid4().hex[:6]}.{extension}"
+
+def export_s3_path(file_name):
+    bucket_name = st.secrets['aws']['S3_BUCKET_NAME']
+    return f"{bucket_name}/{EXPORT_PREFIX}/{file_name}"
+
+def export_order_profit_to_s3(dates, costs, file_format="CSV", marketplace=None, on_progress=None, accounts=None):
+    """
+    Streamt den Export direkt nach S3 (Multipart-Upload von s3fs), ohne den
+    gesamten Zeitraum im Speicher zu halten. Gibt (Pfad, Zeilenzahl) zurück.
+    """
+    s3 = get_s3_fs()
+    full_path = export_s3_path(export_file_name(dates[0], dates[-1], file_format))
+    try:
+        with s3.open(full_path, 'wb') as f:
+            row_count = write_order_profit(iter_order_profit_chunks(dates, costs, marketplace, on_progress=on_progress, accounts=accounts), f, file_format)
+        logger.info(f"Export mit {row_count} Bestellungen gespeichert: {full_path}")
+        return full_path, row_count
+    except Exception as e:
+        logger.error(f"Fehler beim Export der Bestellgewinne: {str(e)}")
+        raise
+
+def export_order_profit_to_file(dates, costs, file_format="CSV", marketplace=None, on_progress=None, accounts=None):
+    """
+    Schreibt den Export blockweise in eine eigene temporäre Datei. Gibt
+    (Pfad, Dateiname, Zeilenzahl) zurück; der Aufrufer löscht die Datei.
+    """
+    file_name = export_file_name(dates[0], dates[-1], file_format)
+    stem, extension = os.path.splitext(file_name)
+    fd, path = tempfile.mkstemp(prefix=f"{stem}_", suffix=extension)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            row_count = write_order_profit(iter_order_profit_chunks(dates, costs, marketplace, on_progress=on_progress, accounts=accounts), f, file_format)
+        return path, file_name, row_count
+    except Exception as e:
+        os.remove(path)
+        logger.error(f"Fehler beim Export der Bestellgewinne: {str(e)}")
+        raise
+
+def upload_export_to_s3(path, file_name):
+    """Lädt eine lokal geschriebene Exportdatei nach S3 hoch, ohne sie in den Speicher zu lesen."""
+    full_path = export_s3_path(file_name)
+    get_s3_fs().put(path, full_path)
+    return full_path
+
+def presigned_url(path, expires=3600):
+    """Zeitlich begrenzter Download-Link für ein Objekt in S3."""
+    return get_s3_fs().url(path, expires=expires)
@@ -0,0 +1,145 @@
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = ("interactive", "batch")
+DEFAULT_REQUESTS_PER_SECOND = 2.0
+DEFAULT_BURST = 2
+# Anzahl interaktiver Anfragen, die bedient werden, bevor eine wartende Batch-Anfrage drankommt
+DEFAULT_INTERACTIVE_WEIGHT = 3
+MAX_PARALLEL_REQUESTS = 4
+
+class TokenBucket:
+    """Klassischer Token Bucket: `rate` Tokens pro Sekunde, höchstens `capacity` auf Vorrat."""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blockiert, bis ein Token verfügbar ist, und verbraucht es."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class RequestScheduler:
+    """
+    Prozessweiter Scheduler für Anfragen an eine API mit gemeinsamem Ratenlimit.
+
+    - Alle Anfragen teilen sich einen Token Bucket.
+    - Interaktive Anfragen werden bevorzugt, Batch-Anfragen kommen nach
+      `interactive_weight` interaktiven Anfragen trotzdem an die Reihe.
+    - coalesce() bündelt gleichzeitige identische Abrufe zu einem einzigen.
+    """
+
+    def __init__(self, rate=DEFAULT_REQUESTS_PER_SECOND, burst=DEFAULT_BURST,
+                 interactive_weight=DEFAULT_INTERACTIVE_WEIGHT, name="api"):
+        self.name = name
+        self._bucket = TokenBucket(rate, burst)
+        self._interactive_weight = interactive_weight
+        self._queues = {priority: deque() for priority in PRIORITIES}
+        self._condition = threading.Condition()
+        self._interactive_streak = 0
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=MAX_PARALLEL_REQUESTS, thread_name_prefix=f"{name}-request")
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name=f"{name}-scheduler", daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, fn, *args, priority="interactive", **kwargs):
+        """Reiht eine Anfrage ein und gibt ein Future mit ihrem Ergebnis zurück."""
+        if priority not in self._queues:
+            raise ValueError(f"Unbekannte Priorität: {priority}")
+        future = Future()
+        with self._condition:
+            self._queues[priority].append((future, fn, args, kwargs))
+            self._condition.notify()
+        return future
+
+    def run(self, fn, *args, priority="interactive", **kwargs):
+        """Führt eine Anfrage unter Einhaltung des Ratenlimits aus und wartet auf das Ergebnis."""
+        return self.submit(fn, *args, priority=priority, **kwargs).result()
+
+    def coalesce(self, key, fn, *args, **kwargs):
+        """
+        Führt fn nur einmal aus, solange für `key` bereits ein Abruf läuft.
+        Weitere Aufrufer mit demselben Schlüssel erhalten dasselbe Ergebnis.
+        """
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+        if not owner:
+            logger.info(f"{self.name}: schließe mich laufendem Abruf {key} an")
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def queue_lengths(self):
+        with self._condition:
+            return {priority: len(queue) for priority, queue in self._queues.items()}
+
+    def _next_task(self):
+        interactive, batch = self._queues["interactive"], self._queues["batch"]
+        if interactive and (not batch or self._interactive_streak < self._interactive_weight):
+            self._interactive_streak += 1
+            return interactive.popleft()
+        self._interactive_streak = 0
+        return batch.popleft()
+
+    def _dispatch_loop(self):
+        while True:
+            with self._condition:
+                while not any(self._queues.values()):
+                    self._condition.wait()
+            # Erst auf das Token warten, dann auswählen: so überholen später
+            # eintreffende interaktive Anfragen noch wartende Batch-Anfragen.
+            self._bucket.acquire()
+            with self._condition:
+                future, fn, args, kwargs = self._next_task()
+            if future.set_running_or_notify_cancel():
+                self._executor.submit(self._execute, future, fn, args, kwargs)
+
+    @staticmethod
+    def _execute(future, fn, args, kwargs):
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+def get_scheduler(key, rate=DEFAULT_REQUESTS_PER_SECOND, burst=DEFAULT_BURST):
+    """Liefert den prozessweiten Scheduler für einen API-Schlüssel (ein Ratenlimit pro Schlüssel)."""
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None:
+            scheduler = RequestScheduler(rate=rate, burst=burst, name=f"billbee-{len(_schedulers) + 1}")
+            _schedulers[key] = scheduler
+        return scheduler
@@ -1,27 +1,52 @@
 import pandas as pd
-from src.s3_utils import get_s3_fs
+from src.s3_utils import get_s3_fs, read_csv_from_s3, write_csv_to_s3, read_bytes_from_s3, write_bytes_to_s3
+from src.data_processor import deduplicate_orders
+from src.order_schema import read_orders_csv, optimize_order_dtypes
+from src.cache import day_frame_cache, invalidate_dates
+from src.cost_index import update_cost_index
+from src.accounts import account_prefix, resolve_account
 import logging
-import streamlit as st
+import json
+import threading
 from io import StringIO
+import streamlit as st
 
 logger = logging.getLogger(__name__)
 
 SALES_FILE = "all_sales_data_profit_app.csv"
+ORDER_KEY = "BillbeeID"
+
+# Serialisiert Upserts je Konto und Tagespartition, damit sich Index-Updates nicht
+# überschreiben; verschiedene Tage und Konten werden parallel geschrieben
+_upsert_locks = {}
+_upsert_locks_guard = threading.Lock()
+
+def _upsert_lock(account, partition):
+    with _upsert_locks_guard:
+        return _upsert_locks.setdefault((account, partition), threading.Lock())
+
+def partition_path(prefix, partition):
+    return f"{prefix}/billbee_orders_{partition}.csv"
+
+def order_index_path(prefix, partition):
+    """Der Hash-Index einer Tagespartition liegt direkt neben ihr."""
+    return f"{prefix}/billbee_orders_{partition}.index.json"
 
-def save_to_s3(df, date):
+def save_to_s3(df, date, account=None):
     """Speichert neue Verkaufsdaten in S3."""
     try:
         s3 = get_s3_fs()
-        bucket_name = st.secrets['aws']['S3_BUCKET_NAME']
-        file_name = f"billbee_orders_{date.strftime('%Y-%m-%d')}.csv"
-        full_path = f"{bucket_name}/{file_name}"
-        
-        csv_buffer = StringIO()
-        df.to_csv(csv_buffer, index=False)
-        csv_buffer.seek(0)
+        account = resolve_account(account)
+        partition = date.strftime('%Y-%m-%d')
+        full_path = partition_path(account_prefix(account), partition)
         
-        with s3.open(full_path, 'w') as f:
-            f.write(csv_buffer.getvalue())
+        with _upsert_lock(account, partition):
+            write_csv_to_s3(s3, full_path, df)
+            # Die Partition wurde vollständig ersetzt; ihr Index gilt nicht mehr
+            index_path = order_index_path(account_prefix(account), partition)
+            if s3.exists(index_path):
+                s3.rm(index_path)
+        invalidate_dates([date], account)
         
         logger.info(f"CSV-Datei erfolgreich in S3 gespeichert: {full_path}")
         return full_path
@@ -30,6 +55,103 @@ def save_to_s3(df, date):
         raise
 
 
+def _canonical_orders(df):
+    """
+    Bringt Bestellungen in die Form, in der sie aus einer gespeicherten Partition
+    zurückgelesen werden: CSV-Rundreise, Zahlen auf sechs Nachkommastellen
+    gerundet. So liefern neue und gespeicherte Bestellungen denselben Hash, auch
+    wenn die CSV-Rundreise die letzte Stelle einer Gleitkommazahl verändert.
+    """
+    parsed = pd.read_csv(StringIO(df.to_csv(index=False)))
+    for col in parsed.columns:
+        if pd.api.types.is_numeric_dtype(parsed[col]):
+            parsed[col] = parsed[col].astype(float).round(6).map(repr)
+        else:
+            parsed[col] = parsed[col].astype(str)
+    return parsed
+
+def compute_order_hashes(df):
+    """Berechnet pro Bestellung einen Inhalts-Hash über alle Spalten außer 'Date'."""
+    columns = [col for col in df.columns if col != 'Date']
+    hashes = pd.util.hash_pandas_object(_canonical_orders(df[columns]), index=False)
+    return hashes.map('{:016x}'.format)
+
+def load_order_index(s3, prefix, partition):
+    """Lädt den Index BillbeeID -> Hash einer Tagespartition aus S3."""
+    full_path = order_index_path(prefix, partition)
+    if not s3.exists(full_path):
+        return {}
+    return json.loads(read_bytes_from_s3(s3, full_path).decode('utf-8'))
+
+def save_order_index(s3, prefix, partition, index):
+    """Speichert den Index einer Tagespartition in S3."""
+    write_bytes_to_s3(s3, order_index_path(prefix, partition), json.dumps(index, separators=(',', ':')).encode('utf-8'))
+
+def upsert_to_s3(df, date, account=None, removed_ids=None):
+    """
+    Schreibt nur neue oder geänderte Bestellungen (Schlüssel: BillbeeID) in die
+    Tagespartition. Bereits gespeicherte Bestellungen bleiben erhalten, unveränderte
+    Bestellungen lösen keinen Schreibvorgang aus. Fehlt die Partition oder ihr
+    Index, werden alle Bestellungen geschrieben. Bestellungen aus `removed_ids`
+    (gelöscht oder storniert) werden aus Partition und Index entfernt. Gibt die
+    Anzahl der geschriebenen oder entfernten Bestellungen zurück.
+    """
+    removed_ids = {str(order_id) for order_id in removed_ids or ()}
+    if (df is None or df.empty) and not removed_ids:
+        return 0
+    account = resolve_account(account)
+    partition = date.strftime('%Y-%m-%d')
+    try:
+        with _upsert_lock(account, partition):
+            s3 = get_s3_fs()
+            prefix = account_prefix(account)
+            full_path = partition_path(prefix, partition)
+
+            new_data = deduplicate_orders(df) if df is not None and not df.empty else pd.DataFrame(columns=[ORDER_KEY])
+            partition_exists = s3.exists(full_path)
+            existing = None
+            # Ohne Partition ist der Index wertlos: dann alles neu schreiben
+            index = load_order_index(s3, prefix, partition) if partition_exists else {}
+            if partition_exists and not index:
+                # Partition ohne Index (z.B. über save_to_s3 geschrieben): Index aus dem Bestand aufbauen
+                existing = read_csv_from_s3(s3, full_path)
+                index = dict(zip(existing[ORDER_KEY].astype(str), compute_order_hashes(existing)))
+            order_ids = new_data[ORDER_KEY].astype(str)
+            hashes = compute_order_hashes(new_data) if not new_data.empty else pd.Series(dtype=str)
+
+            changed_mask = [index.get(order_id) != order_hash
+                            for order_id, order_hash in zip(order_ids, hashes)]
+            changed = new_data[changed_mask]
+            removed_ids &= set(index)
+            if changed.empty and not removed_ids:
+                logger.info(f"Keine neuen oder geänderten Bestellungen für {partition}")
+                return 0
+            changed_ids = set(order_ids[changed_mask])
+
+            if partition_exists:
+                if existing is None:
+                    existing = read_csv_from_s3(s3, full_path)
+                existing = existing[~existing[ORDER_KEY].astype(str).isin(changed_ids | removed_ids)]
+                combined = deduplicate_orders(pd.concat([existing, changed], ignore_index=True))
+            else:
+                combined = changed
+            write_csv_to_s3(s3, full_path, combined)
+            invalidate_dates([date], account)
+
+            for order_id in removed_ids:
+                index.pop(order_id, None)
+            for order_id, order_hash in zip(order_ids[changed_mask], hashes[changed_mask]):
+                index[order_id] = order_hash
+            save_order_index(s3, prefix, partition, index)
+            if not changed.empty:
+                update_cost_index(s3, account, changed, partition)
+
+            logger.info(f"{len(changed)} neue oder geänderte und {len(removed_ids)} entfernte Bestellungen in {full_path} gespeichert")
+            return len(changed) + len(removed_ids)
+    except Exception as e:
+        logger.error(f"Fehler beim Upsert in S3: {str(e)}")
+        raise
+
 def get_saved_dates(days=30):
     """Holt gespeicherte Daten aus S3."""
     try:
@@ -45,19 +167,23 @@ def get_saved_dates(days=30):
         logger.error(f"Fehler beim Abrufen der gespeicherten Daten: {str(e)}")
         return set()
 
-def load_from_s3(date):
+def load_from_s3(date, use_cache=True, account=None):
+    """
+    Lädt die Bestellpartition eines Tages und Kontos. Geladene Partitionen werden
+    prozessweit zwischengespeichert und dürfen vom Aufrufer nicht verändert werden.
+    """
+    account = resolve_account(account)
+    if use_cache:
+        return day_frame_cache.get_or_compute((account, date), lambda: load_from_s3(date, use_cache=False, account=account))
     s3 = get_s3_fs()
-    bucket_name = st.secrets['aws']['S3_BUCKET_NAME']
-    file_name = f"billbee_orders_{date.strftime('%Y-%m-%d')}.csv"
-    full_path = f"{bucket_name}/{file_name}"
+    full_path = partition_path(account_prefix(account), date.strftime('%Y-%m-%d'))
     
     logger.info(f"Versuche, Datei zu laden: {full_path}")
     
     try:
         if s3.exists(full_path):
             logger.info(f"Datei gefunden: {full_path}")
-            with s3.open(full_path, 'rb') as f:
-                df = pd.read_csv(f)
+            df = read_orders_csv(s3, full_path)
             logger.info(f"Datei erfolgreich geladen. Anzahl der Zeilen: {len(df)}")
             return df
         else:
@@ -75,24 +201,21 @@ def get_all_data_since_date(start_date):
         full_path = f"{bucket_name}/{SALES_FILE}"
         
         if s3.exists(full_path):
-            all_data = load_existing_data(s3, full_path)
-            all_data['Date'] = pd.to_datetime(all_data['Date'])
+            all_data = optimize_order_dtypes(load_existing_data(s3, full_path))
             return all_data[all_data['Date'] >= pd.to_datetime(start_date)]
         return pd.DataFrame()
     except Exception as e:
         logger.error(f"Fehler beim Abrufen der Daten: {str(e)}")
         return pd.DataFrame()
 
-def save_daily_order_data(df, date):
+def save_daily_order_data(df, date, account=None):
     """Speichert tägliche Bestelldaten in S3."""
     try:
         s3 = get_s3_fs()
-        bucket_name = st.secrets['aws']['S3_BUCKET_NAME']
         file_name = f"daily_orders_{date.strftime('%Y-%m-%d')}.csv"
-        full_path = f"{bucket_name}/{file_name}"
+        full_path = f"{account_prefix(account)}/{file_name}"
         
-        with s3.open(full_path, 'w') as f:
-            df.to_csv(f, index=False)
+        write_csv_to_s3(s3, full_path, df)
         
         logger.info(f"Tägliche Bestelldaten für {date} erfolgreich in S3 gespeichert.")
     except Exception as e:
@@ -101,8 +224,7 @@ def save_daily_order_data(df, date):
 
 def load_existing_data(s3, file_path):
     """Lädt existierende Daten aus S3."""
-    with s3.open(file_path, 'rb') as f:
-        return pd.read_csv(f)
+    return read_csv_from_s3(s3, file_path)
 
 def prepare_new_data(new_data, date):
     """Bereitet neue Daten für das Speichern vor."""
@@ -110,11 +232,10 @@ def prepare_new_data(new_data, date):
     return new_data
 
 def combine_data(existing_data, new_data, date):
-    """Kombiniert existierende und neue Daten."""
+    """Kombiniert existierende und neue Daten. Neuere Stände ersetzen ältere (BillbeeID)."""
     new_data['Date'] = date
-    return pd.concat([existing_data, new_data], ignore_index=True)
+    return deduplicate_orders(pd.concat([existing_data, new_data], ignore_index=True))
 
 def save_combined_data(s3, file_path, data):
     """Speichert kombinierte Daten in S3."""
-    with s3.open(file_path, 'w') as f:
-        data.to_csv(f, index=False)
+    write_csv_to_s3(s3, file_path, data)
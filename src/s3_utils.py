@@ -1,9 +1,21 @@
 import s3fs
 import streamlit as st
 import logging
+import gzip
+from io import BytesIO
+import pandas as pd
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_COMPRESSION = "gzip"
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
 def get_s3_fs():
     try:
         return s3fs.S3FileSystem(
@@ -16,3 +28,60 @@ def get_s3_fs():
     except Exception as e:
         logger.error(f"Fehler beim Erstellen der S3-Verbindung: {str(e)}")
         raise
+
+def get_compression():
+    """
+    Liefert das konfigurierte Kompressionsverfahren für neue S3-Objekte
+    ("gzip", "zstd" oder "none"), einstellbar über st.secrets["storage"]["COMPRESSION"].
+    """
+    try:
+        codec = str(st.secrets.get("storage", {}).get("COMPRESSION", DEFAULT_COMPRESSION)).lower()
+    except Exception:
+        codec = DEFAULT_COMPRESSION
+    if codec == "zstd" and zstandard is None:
+        logger.warning("zstd ist konfiguriert, aber 'zstandard' ist nicht installiert. Verwende gzip.")
+        return "gzip"
+    if codec not in ("gzip", "zstd", "none"):
+        logger.warning(f"Unbekanntes Kompressionsverfahren '{codec}'. Verwende {DEFAULT_COMPRESSION}.")
+        return DEFAULT_COMPRESSION
+    return codec
+
+def compress_bytes(data, compression=None):
+    """Komprimiert Bytes mit dem angegebenen bzw. konfigurierten Verfahren."""
+    compression = compression or get_compression()
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return data
+
+def decompress_bytes(data):
+    """
+    Entpackt Bytes anhand ihrer Magic Number. Unkomprimierte Altbestände
+    werden unverändert zurückgegeben.
+    """
+    if data.startswith(GZIP_MAGIC):
+        return gzip.decompress(data)
+    if data.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise RuntimeError("zstd-komprimiertes Objekt gefunden, aber 'zstandard' ist nicht installiert.")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+def write_bytes_to_s3(s3, path, data, compression=None):
+    """Schreibt Bytes komprimiert nach S3."""
+    with s3.open(path, 'wb') as f:
+        f.write(compress_bytes(data, compression))
+
+def read_bytes_from_s3(s3, path):
+    """Liest ein (ggf. komprimiertes) Objekt aus S3 und gibt die entpackten Bytes zurück."""
+    with s3.open(path, 'rb') as f:
+        return decompress_bytes(f.read())
+
+def write_csv_to_s3(s3, path, df, compression=None):
+    """Speichert einen DataFrame als (komprimierte) CSV-Datei in S3."""
+    write_bytes_to_s3(s3, path, df.to_csv(index=False).encode('utf-8'), compression)
+
+def read_csv_from_s3(s3, path, **kwargs):
+    """Lädt eine komprimierte oder unkomprimierte CSV-Datei aus S3."""
+    return pd.read_csv(BytesIO(read_bytes_from_s3(s3, path)), **kwargs)
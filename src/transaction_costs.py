@@ -1,5 +1,7 @@
 import pandas as pd
-from src.s3_utils import get_s3_fs
+from src.s3_utils import get_s3_fs, read_csv_from_s3, write_csv_to_s3
+from src.cache import invalidate_cost_caches
+from src.cost_index import changed_keys, dates_for_platforms, affected_cached_dates
 import streamlit as st
 import logging
 
@@ -11,9 +13,8 @@ def load_transaction_costs():
     file_path = f"{bucket_name}/transaction_costs.csv"
     try:
         if s3.exists(file_path):
-            with s3.open(file_path, 'rb') as f:
-                df = pd.read_csv(f)
-                return df
+            df = read_csv_from_s3(s3, file_path)
+            return df
         return pd.DataFrame(columns=['Platform', 'TransactionCostPercent'])
     except Exception as e:
         logger.error(f"Fehler beim Laden der Transaktionskostendaten: {str(e)}")
@@ -24,8 +25,11 @@ def save_transaction_costs(df):
     bucket_name = st.secrets['aws']['S3_BUCKET_NAME']
     file_path = f"{bucket_name}/transaction_costs.csv"
     try:
-        with s3.open(file_path, 'w') as f:
-            df.to_csv(f, index=False)
+        previous = load_transaction_costs()
+        write_csv_to_s3(s3, file_path, df)
+        # Nur Tage verwerfen, an denen auf einer geänderten Plattform verkauft wurde
+        changed_platforms = changed_keys(previous, df, 'Platform', 'TransactionCostPercent')
+        return invalidate_cost_caches(dates=affected_cached_dates(dates_for_platforms(changed_platforms)))
     except Exception as e:
         logger.error(f"Fehler beim Speichern der Transaktionskostendaten: {str(e)}")
         raise